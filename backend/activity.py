@@ -0,0 +1,17 @@
+from sqlalchemy import select
+from database import ReadSessionLocal
+import models
+import json
+
+STREAM_BATCH_SIZE = 1000
+
+async def stream_art_dates():
+    async with ReadSessionLocal() as db:
+        result = await db.stream(
+            select(models.Art.date)
+            .where(models.Art.date.isnot(None))
+            .order_by(models.Art.date, models.Art.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for (date,) in result:
+            yield json.dumps(date.strftime("%Y-%m-%d %H:%M:%S")) + "\n"
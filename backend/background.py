@@ -0,0 +1,70 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BackgroundTask:
+    task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await self.drain()
+
+    async def drain(self):
+        # Runs after the task is cancelled, for work that must not be lost on shutdown.
+        pass
+
+    async def run(self):
+        raise NotImplementedError
+
+class PeriodicTask(BackgroundTask):
+    failure_message = "Background task failed"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    async def tick(self):
+        raise NotImplementedError
+
+    async def wait(self):
+        await asyncio.sleep(self.interval)
+
+    async def run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception(self.failure_message)
+            await self.wait()
+
+class BufferedTask(PeriodicTask):
+    # Flushes every interval, or as soon as the buffer reports itself full.
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self.full = asyncio.Event()
+
+    async def wait(self):
+        try:
+            await asyncio.wait_for(self.full.wait(), self.interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def tick(self):
+        await self.flush()
+
+    async def drain(self):
+        await self.flush()
+
+    async def flush(self):
+        raise NotImplementedError
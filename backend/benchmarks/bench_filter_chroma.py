@@ -0,0 +1,39 @@
+import numpy as np
+import argparse
+import timeit
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import filter_chroma
+
+def make_results(size: int, queries: int, rng: np.random.Generator):
+    return {
+        "ids": [[str(id_) for id_ in rng.choice(10 * size, size, replace=False)] for _ in range(queries)],
+        "distances": [sorted(rng.uniform(0.2, 0.8, size).tolist()) for _ in range(queries)],
+    }
+
+def run(sizes, repeat: int, number: int):
+    rng = np.random.default_rng(0)
+    results = {}
+    for size in sizes:
+        chroma_results = make_results(size, 1, rng)
+        timings = timeit.repeat(lambda: filter_chroma(chroma_results), repeat=repeat, number=number)
+        results[str(size)] = {"best_us_per_call": min(timings) / number * 1e6, "kept": len(filter_chroma(chroma_results))}
+    return {"benchmark": "filter_chroma", "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time filter_chroma over Chroma query results of different sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.sizes, args.repeat, args.number), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
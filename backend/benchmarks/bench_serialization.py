@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+import argparse
+import timeit
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models, schemas, serializers
+import orjson
+
+def make_page(size: int):
+    start = datetime(2024, 3, 11, 15, 26, 13)
+    rows = [
+        (
+            art_id,
+            f"a detailed concept art of a floating city number {art_id}, volumetric light, 8k",
+            f"/images/{art_id:064x}.webp"[:80],
+            start + timedelta(minutes=art_id),
+            False,
+            art_id % 17,
+            "indexed",
+            art_id % 5,
+        )
+        for art_id in range(1, size + 1)
+    ]
+    orm_arts = [
+        models.Art(id=art_id, prompt=prompt, image=image, date=date, premium=premium, owner_id=owner_id, index_status=index_status, like_count=like_count)
+        for art_id, prompt, image, date, premium, owner_id, index_status, like_count in rows
+    ]
+    category_names = {row[0]: ["Concept Art", "Futuristic Cities"] for row in rows}
+    for art in orm_arts:
+        art.category_names = category_names[art.id]
+    return rows, orm_arts, category_names
+
+def run(size: int, repeat: int, number: int):
+    rows, orm_arts, category_names = make_page(size)
+    adapter = TypeAdapter(List[schemas.Art])
+
+    def pydantic_path():
+        return adapter.dump_json(adapter.validate_python(orm_arts, from_attributes=True))
+
+    def fast_path():
+        return orjson.dumps(serializers.art_list(rows, category_names))
+
+    # Both paths must produce the same payload for the timings to be comparable.
+    assert orjson.loads(pydantic_path()) == orjson.loads(fast_path())
+    results = {}
+    for name, func in (("pydantic_from_attributes", pydantic_path), ("row_tuples_orjson", fast_path)):
+        timings = timeit.repeat(func, repeat=repeat, number=number)
+        results[name] = {"best_us_per_page": min(timings) / number * 1e6, "bytes": len(func())}
+    results["speedup"] = results["pydantic_from_attributes"]["best_us_per_page"] / results["row_tuples_orjson"]["best_us_per_page"]
+    return {"benchmark": "art_list_serialization", "page_size": size, "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Art list serialization paths for one page of arts.")
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.size, args.repeat, args.number), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
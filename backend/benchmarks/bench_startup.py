@@ -0,0 +1,47 @@
+import subprocess
+import argparse
+import json
+import sys
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import time, sys
+started = time.perf_counter()
+import main
+print(time.perf_counter() - started)
+"""
+
+WARM_UP_SCRIPT = """
+import asyncio, json, time, sys
+import main, warmup
+started = time.perf_counter()
+asyncio.run(warmup.warm_up())
+print(json.dumps({"seconds": time.perf_counter() - started, "checks": warmup.checks}))
+"""
+
+def run_python(script: str):
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+def run(repeat: int, warm_up: bool):
+    import_seconds = [float(run_python(IMPORT_SCRIPT)) for _ in range(repeat)]
+    report = {"benchmark": "startup", "import_main_s": {"best": min(import_seconds), "runs": import_seconds}}
+    if warm_up:
+        report["warm_up"] = json.loads(run_python(WARM_UP_SCRIPT))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long a fresh interpreter takes to import the app, and optionally to warm it up.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warm-up", action="store_true", help="Also run the warm-up step against the configured database and Chroma directory.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.repeat, args.warm_up), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
@@ -0,0 +1,73 @@
+import numpy as np
+import argparse
+import tempfile
+import time
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex, DTYPES
+
+class ArrayCollection:
+    def __init__(self, ids, vectors):
+        self.ids = ids
+        self.vectors = vectors
+
+    def get(self, include, limit: int, offset: int):
+        return {"ids": [str(id_) for id_ in self.ids[offset:offset + limit]], "embeddings": self.vectors[offset:offset + limit]}
+
+def exact_top_k(vectors, queries, k: int):
+    distances = (vectors ** 2).sum(axis=1)[None, :] + (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ vectors.T
+    return np.argsort(distances, axis=1)[:, :k]
+
+def run(size: int, dims: int, queries: int, k: int, batch_size: int):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((size, dims), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vectors = vectors[rng.choice(size, queries, replace=False)] + rng.normal(0, 0.05, (queries, dims)).astype(np.float32)
+    expected = exact_top_k(vectors, query_vectors, k)
+
+    results = {}
+    for dtype in DTYPES:
+        index = VectorIndex(tempfile.mkdtemp(prefix=f"bench_vector_index_{dtype}_"), dtype=dtype)
+        # Seed with the first batch the way a fresh deployment would, then append the rest.
+        index.build(ArrayCollection(list(range(min(batch_size, size))), vectors[:batch_size]))
+        started = time.perf_counter()
+        for start in range(batch_size, size, batch_size):
+            index.append(list(range(start, min(start + batch_size, size))), vectors[start:start + batch_size], None)
+        append_seconds = time.perf_counter() - started
+
+        latencies = []
+        recall = 0
+        for query, truth in zip(query_vectors, expected):
+            started = time.perf_counter()
+            found = index.search([query], n_results=k)["ids"][0]
+            latencies.append(time.perf_counter() - started)
+            recall += len(set(map(int, found)) & set(truth.tolist())) / k
+
+        generation = index.read_manifest()["generation"]
+        results[dtype] = {
+            "append_s": append_seconds,
+            "vector_bytes": os.path.getsize(index.file(generation, "vectors")),
+            "query_ms": {"p50": float(np.percentile(latencies, 50) * 1000), "p95": float(np.percentile(latencies, 95) * 1000)},
+            f"recall_at_{k}": recall / queries,
+        }
+    return {"benchmark": "vector_index", "size": size, "dims": dims, "queries": queries, "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory-mapped prompt index size, query latency and recall for each storage dtype.")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.size, args.dims, args.queries, args.k, args.batch_size), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
@@ -0,0 +1,49 @@
+from fastapi import FastAPI, Body
+import argparse
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_functions import HashingEmbeddingFunction
+
+def create_app(dimensions: int, latency_ms: float, per_text_ms: float):
+    app = FastAPI()
+    embedder = HashingEmbeddingFunction(dimensions)
+    stats = {"requests": 0, "texts": 0}
+
+    @app.post("/v1/embeddings")
+    async def create_embeddings(payload: dict = Body(...)):
+        texts = payload["input"]
+        if isinstance(texts, str):
+            texts = [texts]
+        stats["requests"] += 1
+        stats["texts"] += len(texts)
+        await asyncio.sleep((latency_ms + per_text_ms * len(texts)) / 1000)
+        vectors = [embedder.embed(text).tolist() for text in texts]
+        return {
+            "object": "list",
+            "model": payload.get("model", "fake"),
+            "data": [{"object": "embedding", "index": index, "embedding": vector} for index, vector in enumerate(vectors)],
+            "usage": {"prompt_tokens": sum(len(text.split()) for text in texts), "total_tokens": sum(len(text.split()) for text in texts)},
+        }
+
+    @app.get("/stats")
+    async def read_stats():
+        return stats
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible embeddings endpoint backed by the local hashing embedder. Point OPENAI_API_BASE at http://HOST:PORT/v1.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fixed delay per request, to mimic network round trips.")
+    parser.add_argument("--per-text-ms", type=float, default=0, help="Extra delay per input text.")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.dimensions, args.latency_ms, args.per_text_ms), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,41 @@
+from fastapi import FastAPI, Header, HTTPException
+import argparse
+import asyncio
+import hashlib
+
+def create_app(latency_ms: float):
+    app = FastAPI()
+    stats = {"requests": 0}
+
+    @app.get("/oauth2/v2/userinfo")
+    async def read_userinfo(authorization: str = Header("")):
+        stats["requests"] += 1
+        await asyncio.sleep(latency_ms / 1000)
+        token = authorization.removeprefix("Bearer ").strip()
+        if not token or token.startswith("invalid"):
+            raise HTTPException(status_code=401, detail="Invalid Credentials")
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        return {
+            "id": str(int(digest, 16)),
+            "email": f"{digest}@example.com",
+            "verified_email": True,
+            "name": f"User {digest[:6]}",
+            "picture": f"https://example.com/avatars/{digest}.png",
+        }
+
+    @app.get("/stats")
+    async def read_stats():
+        return stats
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stand-in for Google's userinfo endpoint. Point GOOGLE_USERINFO_URL at http://HOST:PORT/oauth2/v2/userinfo.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--latency-ms", type=float, default=80, help="Delay per request, to mimic the round trip to Google.")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
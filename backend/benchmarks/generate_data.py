@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+from PIL import Image
+import argparse
+import hashlib
+import logging
+import random
+import json
+import time
+import sys
+import io
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+import models, crud, storage
+
+SUBJECTS = ["dragon", "castle", "robot", "astronaut", "samurai", "forest spirit", "city skyline", "lighthouse", "fox", "spaceship", "mermaid", "desert temple"]
+STYLES = ["oil painting", "anime", "pixel art", "watercolor", "concept art", "photorealistic", "cyberpunk", "art nouveau", "low poly", "ukiyo-e"]
+DETAILS = ["at sunset", "in the rain", "under neon lights", "in deep space", "surrounded by fog", "on a floating island", "in winter", "at golden hour"]
+QUALIFIERS = ["highly detailed", "8k", "volumetric light", "trending on artstation", "soft focus", "dramatic lighting", "wide angle"]
+
+def make_prompt(rng: random.Random):
+    qualifiers = ", ".join(rng.sample(QUALIFIERS, rng.randint(1, 3)))
+    return f"{rng.choice(STYLES)} of a {rng.choice(SUBJECTS)} {rng.choice(DETAILS)}, {qualifiers}"
+
+def make_image(rng: random.Random, size: int):
+    start = tuple(rng.randrange(256) for _ in range(3))
+    end = tuple(rng.randrange(256) for _ in range(3))
+    gradient = Image.linear_gradient("L").resize((size, size))
+    image = Image.composite(Image.new("RGB", (size, size), start), Image.new("RGB", (size, size), end), gradient)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def store_image(data: bytes):
+    digest = hashlib.sha256(data).hexdigest()
+    existing = storage.find_blob(digest)
+    if existing:
+        return storage.blob_url(existing)
+    os.makedirs(storage.blob_dir(digest), exist_ok=True)
+    path = os.path.join(storage.blob_dir(digest), f"{digest}.png")
+    with open(path, "wb") as f:
+        f.write(data)
+    return storage.blob_url(path)
+
+def create_users(db, count: int):
+    first = db.query(func.count(models.User.id)).scalar()
+    users = [
+        {"email": f"bench{number}@example.com", "username": f"bench{number}", "picture": "", "description": ""}
+        for number in range(first, first + count)
+    ]
+    user_ids = list(db.execute(insert(models.User).returning(models.User.id), users).scalars())
+    db.commit()
+    return user_ids
+
+def create_arts(db, rng: random.Random, user_ids, count: int, days: int, image_size: int, distinct_images: int, batch_size: int):
+    images = [store_image(make_image(rng, image_size)) for _ in range(distinct_images)]
+    now = datetime.utcnow()
+    art_ids = []
+    for start in range(0, count, batch_size):
+        arts = [
+            {
+                "prompt": make_prompt(rng),
+                "image": rng.choice(images),
+                "date": now - timedelta(seconds=rng.randrange(days * 86400)),
+                "premium": rng.random() < 0.1,
+                "owner_id": rng.choice(user_ids),
+                "index_status": "pending",
+            }
+            for _ in range(min(batch_size, count - start))
+        ]
+        art_ids.extend(db.execute(insert(models.Art).returning(models.Art.id), arts).scalars())
+        db.commit()
+    return art_ids
+
+def index_all(art_ids, batch_size: int):
+    from classifier import category_classifier
+    from indexer import index_arts
+
+    category_classifier.load()
+    indexed = 0
+    for start in range(0, len(art_ids), batch_size):
+        indexed += len(index_arts(art_ids[start:start + batch_size]))
+    return indexed
+
+def generate(users: int, arts: int, days: int, seed: int, image_size: int, distinct_images: int, batch_size: int, index: bool):
+    import seed as category_seed
+
+    rng = random.Random(seed)
+    timings = {}
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        created_categories = category_seed.create_categories(db, category_seed.CATEGORIES)
+        timings["categories_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        user_ids = create_users(db, users)
+        timings["users_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        art_ids = create_arts(db, rng, user_ids, arts, days, image_size, distinct_images, batch_size)
+        timings["arts_s"] = time.perf_counter() - started
+
+        indexed = 0
+        if index:
+            started = time.perf_counter()
+            indexed = index_all(art_ids, batch_size)
+            timings["index_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        crud.rebuild_art_activity(db)
+        timings["activity_s"] = time.perf_counter() - started
+    finally:
+        db.close()
+
+    return {
+        "benchmark": "generate_data",
+        "seed": seed,
+        "categories_created": created_categories,
+        "users": len(user_ids),
+        "arts": len(art_ids),
+        "indexed": indexed,
+        "timings": timings,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the configured database, image store and Chroma collections with synthetic users, arts and categories.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--arts", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365, help="Spread art dates over this many days.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--distinct-images", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-index", dest="index", action="store_false", help="Leave arts pending for the indexer.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(generate(args.users, args.arts, args.days, args.seed, args.image_size, args.distinct_images, args.batch_size, args.index), indent=2))
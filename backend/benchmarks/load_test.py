@@ -0,0 +1,126 @@
+from datetime import datetime
+import numpy as np
+import argparse
+import asyncio
+import random
+import httpx
+import json
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_data import SUBJECTS, STYLES, DETAILS, make_image, make_prompt
+
+SCENARIOS = ["upload", "search", "list", "top_categories", "auth"]
+
+def summarize(latencies, errors: int, duration: float):
+    latencies = np.asarray(latencies) * 1000
+    summary = {"requests": len(latencies), "errors": errors, "duration_s": duration, "throughput_rps": len(latencies) / duration if duration else 0}
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary["latency_ms"] = {"p50": p50, "p95": p95, "p99": p99, "mean": latencies.mean(), "max": latencies.max()}
+    return summary
+
+class Scenario:
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random, args):
+        self.client = client
+        self.rng = rng
+        self.args = args
+
+    async def upload(self, state):
+        if "images" not in state:
+            state["images"] = [make_image(self.rng, self.args.image_size) for _ in range(8)]
+        files = {"image": ("bench.png", self.rng.choice(state["images"]), "image/png")}
+        data = {"prompt": make_prompt(self.rng), "owner_id": str(self.args.owner_id)}
+        return await self.client.post("/arts/", data=data, files=files)
+
+    async def search(self, state):
+        query = " ".join(self.rng.sample([self.rng.choice(SUBJECTS), self.rng.choice(STYLES), self.rng.choice(DETAILS)], self.rng.randint(1, 3)))
+        return await self.client.get("/search/", params={"query": query, "mode": self.args.search_mode})
+
+    async def list(self, state):
+        params = {"limit": self.args.page_size}
+        if state.get("cursor"):
+            params["cursor"] = state["cursor"]
+        response = await self.client.get("/arts/", params=params)
+        state["cursor"] = response.headers.get("x-next-cursor") if state.get("depth", 0) < self.args.max_depth else None
+        state["depth"] = state.get("depth", 0) + 1 if state["cursor"] else 0
+        return response
+
+    async def top_categories(self, state):
+        return await self.client.get("/categories/top/")
+
+    async def auth(self, state):
+        # Tokens are resolved by fake_userinfo_server.py; a small pool exercises the token cache.
+        token = f"bench-token-{self.rng.randrange(self.args.auth_tokens)}"
+        return await self.client.post("/auth/google", json={"access_token": token})
+
+async def run_scenario(name: str, args):
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        async def worker(worker_id: int):
+            nonlocal errors
+            scenario = Scenario(client, random.Random(args.seed * 1000 + worker_id), args)
+            request = getattr(scenario, name)
+            state = {}
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await request(state)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+        for warmup in range(args.warmup):
+            await getattr(Scenario(client, random.Random(warmup), args), name)({})
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(worker_id) for worker_id in range(args.concurrency)))
+        duration = time.perf_counter() - started
+
+    return summarize(latencies, errors, duration)
+
+async def run(args):
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(name, args)
+    return {
+        "benchmark": "load_test",
+        "started": datetime.utcnow().isoformat(),
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive a running API with concurrent requests and report latency percentiles and throughput per scenario.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario.")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before each scenario.")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--owner-id", type=int, default=1)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--search-mode", default="hybrid")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=10, help="Pages to follow with the cursor before starting over.")
+    parser.add_argument("--auth-tokens", type=int, default=100, help="Distinct access tokens used by the auth scenario.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(run(args)), indent=2, default=float)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
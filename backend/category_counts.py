@@ -0,0 +1,28 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+import schemas, crud
+import time
+import os
+
+TOP_CATEGORIES_LIMIT = 10
+TOP_CATEGORIES_TTL_SECONDS = float(os.environ.get("TOP_CATEGORIES_TTL_SECONDS", 10))
+
+class TopCategoriesCache:
+    def __init__(self, ttl: float = TOP_CATEGORIES_TTL_SECONDS, limit: int = TOP_CATEGORIES_LIMIT):
+        self.ttl = ttl
+        self.limit = limit
+        self.value = None
+        self.expires = 0.0
+
+    async def get(self, db: AsyncSession):
+        if self.value is not None and time.monotonic() < self.expires:
+            return self.value
+
+        rows = await crud.get_top_categories(db, self.limit)
+        self.value = [schemas.CategoryCount(name=name, count=count) for name, count in rows]
+        self.expires = time.monotonic() + self.ttl
+        return self.value
+
+    def invalidate(self):
+        self.value = None
+
+top_categories_cache = TopCategoriesCache()
@@ -0,0 +1,81 @@
+from sqlalchemy.orm import Session
+from vector_store import get_categories_collection, get_prompts_collection
+from search_cache import art_cache
+from category_counts import top_categories_cache
+import models, crud
+import numpy as np
+import logging
+import os
+
+CATEGORY_THRESHOLD = float(os.environ.get("CATEGORY_THRESHOLD", 0.35))
+CATEGORY_TOP_K = int(os.environ.get("CATEGORY_TOP_K", 0))
+RECATEGORIZE_CHUNK_SIZE = int(os.environ.get("RECATEGORIZE_CHUNK_SIZE", 500))
+
+logger = logging.getLogger(__name__)
+
+class CategoryClassifier:
+    def __init__(self, threshold: float = CATEGORY_THRESHOLD, top_k: int = CATEGORY_TOP_K):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.ids = None
+        self.matrix = None
+        self.norms = None
+
+    def load(self, collection = None):
+        data = (collection or get_categories_collection()).get(include=["embeddings"])
+        self.ids = np.asarray([int(id_) for id_ in data["ids"]], dtype=np.int64)
+        self.matrix = np.ascontiguousarray(np.asarray(data["embeddings"], dtype=np.float32).reshape(len(self.ids), -1))
+        self.norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        logger.info("Loaded %d category embeddings", len(self.ids))
+
+    def classify(self, embeddings):
+        if self.matrix is None:
+            self.load()
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+        # Squared L2, the metric the Categories collection (and its 0.35 threshold) uses.
+        distances = np.einsum("ij,ij->i", queries, queries)[:, None] + self.norms[None, :] - 2 * (queries @ self.matrix.T)
+
+        categories = []
+        for row in distances:
+            matches = np.flatnonzero(row < self.threshold)
+            matches = matches[np.argsort(row[matches], kind="stable")]
+            if self.top_k:
+                matches = matches[:self.top_k]
+            categories.append(self.ids[matches].tolist())
+        return categories
+
+category_classifier = CategoryClassifier()
+
+def recategorize_arts(db: Session, chunk_size: int = RECATEGORIZE_CHUNK_SIZE):
+    last_id = 0
+    total = 0
+    while True:
+        art_ids = [
+            row[0] for row in
+            db.query(models.Art.id)
+            .filter(models.Art.id > last_id, models.Art.index_status == "indexed")
+            .order_by(models.Art.id)
+            .limit(chunk_size)
+            .all()
+        ]
+        if not art_ids:
+            return total
+        last_id = art_ids[-1]
+
+        stored = get_prompts_collection().get(ids=[str(art_id) for art_id in art_ids], include=["embeddings"])
+        ids = [int(id_) for id_ in stored["ids"]]
+        associations = [
+            {"art_id": art_id, "category_id": category_id}
+            for art_id, category_ids in zip(ids, category_classifier.classify(stored["embeddings"]))
+            for category_id in category_ids
+        ]
+
+        crud.remove_art_categories(db, ids)
+        crud.add_art_categories(db, associations)
+        db.commit()
+        art_cache.invalidate(ids)
+        top_categories_cache.invalidate()
+
+        total += len(ids)
+        logger.info("Recategorized %d arts (up to id %d)", total, last_id)
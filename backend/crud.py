@@ -1,5 +1,12 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import tuple_, bindparam, func, select, literal, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
 import models, schemas
+import base64
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -15,8 +22,135 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
-def get_arts(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Art).offset(skip).limit(limit).all()
+async def upsert_google_user(db: AsyncSession, user_info):
+    statement = insert(models.User).values(
+        email=user_info["email"],
+        username=user_info["name"],
+        picture=user_info["picture"],
+        description="",
+        google_id=user_info["id"],
+    )
+    # Concurrent first sign-ins for the same email update one row instead of failing on the unique index.
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.User.email],
+        set_={"google_id": statement.excluded.google_id, "picture": statement.excluded.picture},
+    ).returning(models.User)
+    return await db.scalar(select(models.User).from_statement(statement).execution_options(populate_existing=True))
+
+art_sort_date = func.coalesce(models.Art.date, literal_column(f"'{models.UNDATED}'::timestamp"))
+
+def encode_cursor(art):
+    raw = f"{(art.date or models.UNDATED).isoformat()}|{art.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, art_id = raw.split("|")
+        return datetime.fromisoformat(date), int(art_id)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+def art_list_query():
+    return select(
+        models.Art.id, models.Art.prompt, models.Art.image, models.Art.date,
+        models.Art.premium, models.Art.owner_id, models.Art.index_status, models.Art.like_count,
+    )
+
+async def get_arts(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = art_list_query().order_by(art_sort_date.desc(), models.Art.id.desc())
+    if cursor:
+        query = query.where(tuple_(art_sort_date, models.Art.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query.limit(limit))).all()
+    next_cursor = encode_cursor(rows[-1]) if rows and len(rows) == limit else None
+    return rows, next_cursor
+
+async def get_art_rows(db: AsyncSession, art_ids):
+    return (await db.execute(art_list_query().where(models.Art.id.in_(art_ids)))).all()
+
+async def get_category_names(db: AsyncSession, art_ids):
+    result = await db.execute(
+        select(models.art_categories.c.art_id, models.Category.name)
+        .join(models.Category, models.Category.id == models.art_categories.c.category_id)
+        .where(models.art_categories.c.art_id.in_(art_ids))
+        .order_by(models.art_categories.c.art_id, models.Category.name)
+    )
+    names = {}
+    for art_id, name in result:
+        names.setdefault(art_id, []).append(name)
+    return names
+
+async def fan_out_art(db: AsyncSession, art_id: int, owner_id: int, date: datetime):
+    followers = select(models.Follow.follower_id, literal(art_id), literal(date)).where(models.Follow.followee_id == owner_id)
+    statement = insert(models.Timeline).from_select(["user_id", "art_id", "date"], followers)
+    result = await db.execute(statement.on_conflict_do_nothing().returning(models.Timeline.user_id))
+    return result.scalars().all()
+
+async def get_timeline(db: AsyncSession, user_id: int, limit: int, before=None):
+    query = select(models.Timeline.art_id.label("id"), models.Timeline.date).where(models.Timeline.user_id == user_id)
+    if before:
+        query = query.where(tuple_(models.Timeline.date, models.Timeline.art_id) < before)
+    query = query.order_by(models.Timeline.date.desc(), models.Timeline.art_id.desc()).limit(limit)
+    return (await db.execute(query)).all()
+
+def popular_user_ids_query(min_followers: int):
+    return (
+        select(models.Follow.followee_id)
+        .group_by(models.Follow.followee_id)
+        .having(func.count() >= min_followers)
+    )
+
+async def get_popular_user_ids(db: AsyncSession, min_followers: int):
+    return set((await db.execute(popular_user_ids_query(min_followers))).scalars())
+
+async def get_followee_ids(db: AsyncSession, user_id: int, followee_ids):
+    if not followee_ids:
+        return []
+    result = await db.execute(
+        select(models.Follow.followee_id)
+        .where(models.Follow.follower_id == user_id, models.Follow.followee_id.in_(followee_ids))
+    )
+    return result.scalars().all()
+
+async def get_owner_art_dates(db: AsyncSession, owner_ids, limit: int, before=None):
+    query = select(models.Art.id, models.Art.date).where(models.Art.owner_id.in_(owner_ids))
+    if before:
+        query = query.where(tuple_(models.Art.date, models.Art.id) < before)
+    query = query.order_by(models.Art.date.desc(), models.Art.id.desc()).limit(limit)
+    return (await db.execute(query)).all()
+
+def _trim_timelines_statement(length: int, user_ids=None):
+    timelines = models.Timeline.__table__
+    ranked = select(
+        timelines.c.user_id, timelines.c.art_id,
+        func.row_number().over(
+            partition_by=timelines.c.user_id,
+            order_by=(timelines.c.date.desc(), timelines.c.art_id.desc()),
+        ).label("position"),
+    )
+    if user_ids is not None:
+        ranked = ranked.where(timelines.c.user_id.in_(user_ids))
+    ranked = ranked.subquery()
+    overflow = select(ranked.c.user_id, ranked.c.art_id).where(ranked.c.position > length)
+    return timelines.delete().where(tuple_(timelines.c.user_id, timelines.c.art_id).in_(overflow))
+
+async def trim_timelines(db: AsyncSession, user_ids, length: int):
+    result = await db.execute(_trim_timelines_statement(length, sorted(user_ids)))
+    return result.rowcount
+
+def rebuild_timelines(db: Session, length: int, min_followers: int):
+    deliveries = (
+        select(models.Follow.follower_id, models.Art.id, models.Art.date)
+        .join(models.Art, models.Art.owner_id == models.Follow.followee_id)
+        .where(models.Art.date.isnot(None), models.Follow.followee_id.notin_(popular_user_ids_query(min_followers)))
+    )
+    db.query(models.Timeline).delete(synchronize_session=False)
+    db.execute(insert(models.Timeline).from_select(["user_id", "art_id", "date"], deliveries))
+    db.execute(_trim_timelines_statement(length))
+    db.commit()
 
 def create_art(db: Session, art: schemas.ArtCreate):
     db_art = models.Art(image=art.image, prompt=art.prompt)
@@ -25,9 +159,189 @@ def create_art(db: Session, art: schemas.ArtCreate):
     db.refresh(db_art)
     return db_art
 
+async def create_arts(db: AsyncSession, arts):
+    result = await db.scalars(insert(models.Art).returning(models.Art, sort_by_parameter_order=True), arts)
+    return result.all()
+
 def create_user_art(db: Session, art: schemas.ArtCreate, user_id: int):
     db_art = models.Art(**art.dict(), owner_id=user_id)
     db.add(db_art)
     db.commit()
     db.refresh(db_art)
     return db_art
+
+def _adjust_category_counts(db: Session, deltas):
+    categories = models.Category.__table__
+    params = [{"b_id": category_id, "delta": delta} for category_id, delta in sorted(deltas.items()) if delta]
+    if params:
+        db.execute(
+            categories.update()
+            .where(categories.c.id == bindparam("b_id"))
+            .values(art_count=categories.c.art_count + bindparam("delta")),
+            params,
+        )
+
+def add_art_categories(db: Session, associations):
+    if not associations:
+        return
+    db.execute(models.art_categories.insert(), associations)
+    _adjust_category_counts(db, Counter(association["category_id"] for association in associations))
+
+def remove_art_categories(db: Session, art_ids):
+    counts = (
+        db.query(models.art_categories.c.category_id, func.count())
+        .filter(models.art_categories.c.art_id.in_(art_ids))
+        .group_by(models.art_categories.c.category_id)
+        .all()
+    )
+    db.execute(models.art_categories.delete().where(models.art_categories.c.art_id.in_(art_ids)))
+    _adjust_category_counts(db, {category_id: -count for category_id, count in counts})
+
+def rebuild_category_counts(db: Session):
+    counted = (
+        select(func.count())
+        .where(models.art_categories.c.category_id == models.Category.id)
+        .scalar_subquery()
+    )
+    db.query(models.Category).update({models.Category.art_count: counted}, synchronize_session=False)
+    db.commit()
+
+async def add_like(db: AsyncSession, user_id: int, art_id: int):
+    statement = insert(models.Like).values(user_id=user_id, art_id=art_id, date=datetime.utcnow())
+    result = await db.execute(statement.on_conflict_do_nothing().returning(models.Like.art_id))
+    return result.scalar() is not None
+
+async def remove_like(db: AsyncSession, user_id: int, art_id: int):
+    statement = models.Like.__table__.delete().where(models.Like.user_id == user_id, models.Like.art_id == art_id)
+    result = await db.execute(statement.returning(models.Like.art_id))
+    return result.scalar() is not None
+
+async def get_like_count(db: AsyncSession, art_id: int):
+    return await db.scalar(select(models.Art.like_count).where(models.Art.id == art_id))
+
+async def adjust_like_counts(db: AsyncSession, deltas):
+    arts = models.Art.__table__
+    params = [{"b_id": art_id, "delta": delta} for art_id, delta in sorted(deltas.items()) if delta]
+    if params:
+        await db.execute(
+            arts.update()
+            .where(arts.c.id == bindparam("b_id"))
+            .values(like_count=arts.c.like_count + bindparam("delta")),
+            params,
+        )
+
+def rebuild_like_counts(db: Session):
+    counted = (
+        select(func.count())
+        .where(models.Like.art_id == models.Art.id)
+        .scalar_subquery()
+    )
+    db.query(models.Art).update({models.Art.like_count: counted}, synchronize_session=False)
+    db.commit()
+
+def rebuild_trending(db: Session, window_hours: float, half_life_hours: float, size: int):
+    now = datetime.utcnow()
+    age_hours = func.extract("epoch", literal(now) - models.Like.date) / 3600
+    scores = (
+        select(models.Like.art_id, func.sum(func.power(0.5, age_hours / half_life_hours)).label("score"))
+        .where(models.Like.date >= now - timedelta(hours=window_hours))
+        .group_by(models.Like.art_id)
+        .subquery()
+    )
+    ranked = (
+        select(func.row_number().over(order_by=(scores.c.score.desc(), scores.c.art_id.desc())), scores.c.art_id, scores.c.score)
+        .order_by(scores.c.score.desc(), scores.c.art_id.desc())
+        .limit(size)
+    )
+    db.query(models.TrendingArt).delete(synchronize_session=False)
+    db.execute(insert(models.TrendingArt).from_select(["rank", "art_id", "score"], ranked))
+    return db.scalar(select(func.count()).select_from(models.TrendingArt))
+
+async def get_trending_ids(db: AsyncSession, limit: int):
+    result = await db.execute(
+        select(models.TrendingArt.art_id)
+        .where(models.TrendingArt.rank <= limit)
+        .order_by(models.TrendingArt.rank)
+    )
+    return result.scalars().all()
+
+async def add_history(db: AsyncSession, searches, views):
+    if searches:
+        await db.execute(insert(models.SearchHistory), searches)
+    if views:
+        await db.execute(insert(models.ArtHistory), views)
+
+async def get_existing_ids(db: AsyncSession, column, ids):
+    ids = {id_ for id_ in ids if id_ is not None}
+    if not ids:
+        return set()
+    return set((await db.execute(select(column).where(column.in_(ids)))).scalars())
+
+async def get_most_viewed_art_ids(db: AsyncSession, since: datetime, limit: int):
+    result = await db.execute(
+        select(models.ArtHistory.art_id)
+        .where(models.ArtHistory.date >= since)
+        .group_by(models.ArtHistory.art_id)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_popular_queries(db: AsyncSession, since: datetime, min_count: int, limit: int):
+    # Anonymous searches count once each, so one user repeating a query does not publish it.
+    searchers = func.coalesce(models.SearchHistory.user_id, -models.SearchHistory.id)
+    count = func.count(func.distinct(searchers)).label("count")
+    result = await db.execute(
+        select(models.SearchHistory.query, count)
+        .where(models.SearchHistory.date >= since, models.SearchHistory.query != "")
+        .group_by(models.SearchHistory.query)
+        .having(count >= min_count)
+        .order_by(count.desc())
+        .limit(limit)
+    )
+    return result.all()
+
+async def get_top_categories(db: AsyncSession, limit: int = 10):
+    result = await db.execute(
+        select(models.Category.name, models.Category.art_count)
+        .where(models.Category.art_count > 0)
+        .order_by(models.Category.art_count.desc(), models.Category.id)
+        .limit(limit)
+    )
+    return result.all()
+
+async def record_art_activity(db: AsyncSession, arts):
+    counts = Counter((art.date.replace(minute=0, second=0, microsecond=0), art.owner_id or 0) for art in arts)
+    if not counts:
+        return
+    statement = insert(models.ArtActivity).values(
+        [{"bucket": bucket, "owner_id": owner_id, "count": count} for (bucket, owner_id), count in sorted(counts.items())]
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[models.ArtActivity.bucket, models.ArtActivity.owner_id],
+        set_={"count": models.ArtActivity.count + statement.excluded.count},
+    ))
+
+async def get_art_activity(db: AsyncSession, bucket: str = "day", start: Optional[datetime] = None, end: Optional[datetime] = None, owner_id: Optional[int] = None):
+    truncated = func.date_trunc(bucket, models.ArtActivity.bucket).label("bucket")
+    query = select(truncated, func.sum(models.ArtActivity.count).label("count"))
+    if start is not None:
+        query = query.where(models.ArtActivity.bucket >= func.date_trunc("hour", start))
+    if end is not None:
+        query = query.where(models.ArtActivity.bucket < end)
+    if owner_id is not None:
+        query = query.where(models.ArtActivity.owner_id == owner_id)
+    result = await db.execute(query.group_by(truncated).order_by(truncated))
+    return result.all()
+
+def rebuild_art_activity(db: Session):
+    hour = func.date_trunc("hour", models.Art.date)
+    owner = func.coalesce(models.Art.owner_id, literal(0))
+    rollup = (
+        select(hour, owner, func.count())
+        .where(models.Art.date.isnot(None))
+        .group_by(hour, owner)
+    )
+    db.query(models.ArtActivity).delete(synchronize_session=False)
+    db.execute(insert(models.ArtActivity).from_select(["bucket", "owner_id", "count"], rollup))
+    db.commit()
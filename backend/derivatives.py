@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from PIL import Image, ImageOps
+from variants import VARIANTS, formats, image_stem, is_image
+import storage
+import multiprocessing
+import asyncio
+import logging
+import glob
+import os
+import re
+
+DERIVATIVES_DIR = "./derivatives"
+DERIVATIVE_WORKERS = int(os.environ.get("DERIVATIVE_WORKERS", 2))
+DERIVATIVE_VERSION = 1
+FORMATS = formats()
+QUALITY = {"webp": 80, "avif": 60}
+MEDIA_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+NAME_PATTERN = re.compile(r"^([A-Za-z0-9-]+)\.([a-z]+)\.([a-z]+)$")
+# UnidentifiedImageError is an OSError; truncated and oversized images raise the others.
+DECODE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+logger = logging.getLogger(__name__)
+executor = None
+pending = set()
+
+def derivative_dir(stem: str):
+    return os.path.join(DERIVATIVES_DIR, stem[:2], stem[2:4])
+
+def derivative_path(stem: str, variant: str, fmt: str):
+    return os.path.join(derivative_dir(stem), f"{stem}.{variant}.{fmt}")
+
+def source_path(stem: str):
+    found = storage.find_blob(stem)
+    if found:
+        return found
+    matches = glob.glob(os.path.join(storage.IMAGES_DIR, f"{stem}.*"))
+    return matches[0] if matches else None
+
+def render_derivatives(path: str):
+    stem = image_stem(path)
+    targets = [(variant, fmt) for variant in VARIANTS for fmt in FORMATS if not os.path.exists(derivative_path(stem, variant, fmt))]
+    if not targets:
+        return 0
+
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    os.makedirs(derivative_dir(stem), exist_ok=True)
+    resized = {}
+    for variant, fmt in targets:
+        if variant not in resized:
+            resized[variant] = image.copy()
+            resized[variant].thumbnail((VARIANTS[variant], VARIANTS[variant]), Image.LANCZOS)
+        target = derivative_path(stem, variant, fmt)
+        temp = f"{target}.{os.getpid()}.part"
+        resized[variant].save(temp, format=fmt.upper(), quality=QUALITY[fmt])
+        os.replace(temp, target)
+    return len(targets)
+
+def get_executor():
+    global executor
+    if executor is None:
+        # The app process runs threads (embedding batcher, to_thread workers), which fork does not copy safely.
+        executor = ProcessPoolExecutor(max_workers=DERIVATIVE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return executor
+
+def start():
+    get_executor()
+
+def shutdown():
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+
+async def generate(path: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), render_derivatives, path)
+
+async def _generate_in_background(path: str):
+    try:
+        return await generate(path)
+    except DECODE_ERRORS as e:
+        logger.warning("Skipping derivatives for %s: %s", path, e)
+
+def _log_failure(task):
+    pending.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error("Derivative generation failed", exc_info=task.exception())
+
+def schedule(image_url: str):
+    path = source_path(image_stem(image_url))
+    if path and is_image(path):
+        task = asyncio.create_task(_generate_in_background(path))
+        pending.add(task)
+        task.add_done_callback(_log_failure)
+
+async def serve(name: str, request: Request):
+    match = NAME_PATTERN.match(name)
+    if not match or match.group(2) not in VARIANTS or match.group(3) not in FORMATS:
+        raise HTTPException(status_code=404, detail="Not found")
+    stem, variant, fmt = match.groups()
+
+    path = derivative_path(stem, variant, fmt)
+    if not os.path.exists(path):
+        source = source_path(stem)
+        if source is None or not is_image(source):
+            raise HTTPException(status_code=404, detail="Not found")
+        try:
+            await generate(source)
+        except DECODE_ERRORS:
+            # Corrupt or undecodable uploads have no derivatives.
+            raise HTTPException(status_code=404, detail="Not found")
+
+    headers = {"ETag": f'"{stem}.{variant}.{fmt}.v{DERIVATIVE_VERSION}"', "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+def _backfill_one(path: str):
+    try:
+        return render_derivatives(path)
+    except Exception as e:
+        logger.warning("Skipping %s: %s", path, e)
+        return 0
+
+def backfill(workers: int = DERIVATIVE_WORKERS):
+    paths = [
+        path for path in glob.glob(os.path.join(storage.IMAGES_DIR, "**", "*.*"), recursive=True)
+        if not path.endswith(".part")
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rendered = sum(pool.map(_backfill_one, paths, chunksize=8))
+    logger.info("Rendered %d derivatives for %d images", rendered, len(paths))
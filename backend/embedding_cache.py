@@ -0,0 +1,134 @@
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import register_embedding_function
+from collections import OrderedDict
+import numpy as np
+import unicodedata
+import threading
+import hashlib
+import sqlite3
+import os
+
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.environ.get("EMBEDDING_CACHE_MEMORY_SIZE", 4096))
+EMBEDDING_CACHE_DISK_SIZE = int(os.environ.get("EMBEDDING_CACHE_DISK_SIZE", 1000000))
+EVICTION_INTERVAL = 1024
+SQLITE_BATCH = 500
+
+def normalize_text(text: str):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+@register_embedding_function
+class CachedEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, embedding_function, model_name: str, path: str = EMBEDDING_CACHE_PATH,
+                 memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE, disk_size: int = EMBEDDING_CACHE_DISK_SIZE):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes_since_eviction = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_accessed ON embeddings (accessed)")
+        self.db.commit()
+
+    @staticmethod
+    def name():
+        return "cached"
+
+    def get_config(self):
+        return {"model_name": self.model_name}
+
+    @staticmethod
+    def build_from_config(config):
+        # The cache wraps the process-wide provider, which is configured from the environment.
+        from embeddings import get_embedding_function
+
+        return get_embedding_function()
+
+    def key(self, text: str):
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [self.key(text) for text in input]
+        found = {}
+
+        with self.lock:
+            for key in keys:
+                if key not in found and key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.hits += 1
+
+            stored = self._read([key for key in set(keys) if key not in found])
+            self.disk_hits += len(stored)
+            for key, vector in stored.items():
+                self._remember(key, vector)
+            found.update(stored)
+
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in found:
+                missing[key] = normalize_text(text)
+
+        if missing:
+            vectors = self.embedding_function(list(missing.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, vectors)}
+            with self.lock:
+                self.misses += len(fresh)
+                self._write(fresh)
+                for key, vector in fresh.items():
+                    self._remember(key, vector)
+            found.update(fresh)
+
+        return [found[key].tolist() for key in keys]
+
+    def stats(self):
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+        }
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _read(self, keys):
+        stored = {}
+        for start in range(0, len(keys), SQLITE_BATCH):
+            batch = keys[start:start + SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch).fetchall()
+            for key, blob in rows:
+                stored[key] = np.frombuffer(blob, dtype=np.float32)
+            if rows:
+                self.db.execute(f"UPDATE embeddings SET accessed = julianday('now') WHERE key IN ({placeholders})", batch)
+        if stored:
+            self.db.commit()
+        return stored
+
+    def _write(self, vectors):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, accessed) VALUES (?, ?, julianday('now'))",
+            [(key, vector.tobytes()) for key, vector in vectors.items()],
+        )
+        self.writes_since_eviction += len(vectors)
+        if self.writes_since_eviction >= EVICTION_INTERVAL:
+            self.db.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.disk_size,),
+            )
+            self.writes_since_eviction = 0
+        self.db.commit()
@@ -0,0 +1,119 @@
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import register_embedding_function
+from concurrent.futures import Future
+from embeddings import EMBEDDING_DIMENSIONS, EMBEDDING_MAX_BATCH, EMBEDDING_BATCH_WAIT_MS, EMBEDDING_MAX_CONCURRENCY, OPENAI_API_BASE
+import numpy as np
+import threading
+import hashlib
+import queue
+import time
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+@register_embedding_function
+class HashingEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    @staticmethod
+    def name():
+        return "local-hash"
+
+    def get_config(self):
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashingEmbeddingFunction(config["dimensions"])
+
+    def features(self, text: str):
+        words = TOKEN_PATTERN.findall(text.lower())
+        yield from words
+        yield from (f"{first} {second}" for first, second in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            yield from (padded[start:start + 3] for start in range(len(padded) - 2))
+
+    def embed(self, text: str):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self.features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [self.embed(text).tolist() for text in input]
+
+class BatchingEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, embedding_function, max_batch: int = EMBEDDING_MAX_BATCH,
+                 wait_ms: float = EMBEDDING_BATCH_WAIT_MS, max_concurrency: int = EMBEDDING_MAX_CONCURRENCY):
+        self.embedding_function = embedding_function
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.requests = queue.Queue()
+        self.calls = 0
+        self.texts = 0
+        self.dispatcher = threading.Thread(target=self._dispatch, name="embedding-batcher", daemon=True)
+        self.dispatcher.start()
+
+    @staticmethod
+    def name():
+        return "batching"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if not input:
+            return []
+        future = Future()
+        self.requests.put((list(input), future))
+        return future.result()
+
+    def stats(self):
+        return {"calls": self.calls, "texts": self.texts, "queued": self.requests.qsize()}
+
+    def _dispatch(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0][0])
+            # Wait for a free slot before collecting more, so a backlog merges into fewer, larger calls.
+            self.slots.acquire()
+            deadline = time.monotonic() + self.wait
+            while size < self.max_batch:
+                try:
+                    request = self.requests.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+            threading.Thread(target=self._run, args=(batch,), daemon=True).start()
+
+    def _run(self, batch):
+        try:
+            unique = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+            vectors = {}
+            # A single oversized request still goes out in provider-sized calls.
+            for start in range(0, len(unique), self.max_batch):
+                chunk = unique[start:start + self.max_batch]
+                vectors.update(zip(chunk, self.embedding_function(chunk)))
+                self.calls += 1
+            self.texts += len(unique)
+            for texts, future in batch:
+                future.set_result([vectors[text] for text in texts])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.slots.release()
+
+def create_provider(provider: str, model_name: str):
+    if provider == "local":
+        return HashingEmbeddingFunction()
+    if provider == "openai":
+        from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+        return OpenAIEmbeddingFunction(api_key_env_var="OPENAI_API_KEY", model_name=model_name, api_base=OPENAI_API_BASE)
+    raise ValueError(f"Unknown embedding provider: {provider}")
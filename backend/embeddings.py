@@ -0,0 +1,43 @@
+# Chroma is heavy to import, so the embedding function classes live in modules loaded on first use.
+import threading
+import os
+
+EMBEDDING_PROVIDER = os.environ.get("EMBEDDING_PROVIDER", "openai")
+# Switching provider or model changes the vector space; existing collections must be rebuilt with
+# `python manage.py reindex-prompts --recreate` and `python manage.py seed-categories --recreate`.
+EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", 384))
+EMBEDDING_MAX_BATCH = int(os.environ.get("EMBEDDING_MAX_BATCH", 256))
+EMBEDDING_BATCH_WAIT_MS = float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", 5))
+EMBEDDING_MAX_CONCURRENCY = int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", 4))
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE")
+DEFAULT_MODELS = {"openai": "text-embedding-ada-002", "local": f"local-hash-{EMBEDDING_DIMENSIONS}"}
+MODEL_DIMENSIONS = {"text-embedding-ada-002": 1536, "text-embedding-3-small": 1536, "text-embedding-3-large": 3072}
+
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", DEFAULT_MODELS.get(EMBEDDING_PROVIDER, ""))
+batching_function = None
+embedding_function = None
+lock = threading.Lock()
+
+def create_embedding_function(max_batch: int = EMBEDDING_MAX_BATCH, max_concurrency: int = EMBEDDING_MAX_CONCURRENCY):
+    from embedding_functions import BatchingEmbeddingFunction, create_provider
+    from embedding_cache import CachedEmbeddingFunction
+
+    batching = BatchingEmbeddingFunction(create_provider(EMBEDDING_PROVIDER, EMBEDDING_MODEL), max_batch=max_batch, max_concurrency=max_concurrency)
+    return CachedEmbeddingFunction(batching, EMBEDDING_MODEL), batching
+
+def get_embedding_function():
+    global batching_function, embedding_function
+    with lock:
+        if embedding_function is None:
+            embedding_function, batching_function = create_embedding_function()
+    return embedding_function
+
+def embedding_dimensions():
+    if EMBEDDING_PROVIDER == "local":
+        return EMBEDDING_DIMENSIONS
+    return MODEL_DIMENSIONS.get(EMBEDDING_MODEL)
+
+def stats():
+    if embedding_function is None:
+        return {"model": EMBEDDING_MODEL, "loaded": False}
+    return {**embedding_function.stats(), "batching": batching_function.stats()}
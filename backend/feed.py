@@ -0,0 +1,105 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from background import PeriodicTask
+from typing import Optional
+import asyncio
+import logging
+import crud
+import time
+import os
+
+FEED_TIMELINE_LENGTH = int(os.environ.get("FEED_TIMELINE_LENGTH", 1000))
+FEED_POPULAR_FOLLOWERS = int(os.environ.get("FEED_POPULAR_FOLLOWERS", 10000))
+FEED_POPULAR_TTL_SECONDS = float(os.environ.get("FEED_POPULAR_TTL_SECONDS", 60))
+FEED_TRIM_INTERVAL_SECONDS = float(os.environ.get("FEED_TRIM_INTERVAL_SECONDS", 30))
+
+logger = logging.getLogger(__name__)
+
+class PopularUsersCache:
+    def __init__(self, min_followers: int = FEED_POPULAR_FOLLOWERS, ttl: float = FEED_POPULAR_TTL_SECONDS):
+        self.min_followers = min_followers
+        self.ttl = ttl
+        self.value = None
+        self.expires = 0.0
+
+    async def get(self, db: AsyncSession):
+        if self.value is not None and time.monotonic() < self.expires:
+            return self.value
+
+        self.value = await crud.get_popular_user_ids(db, self.min_followers)
+        self.expires = time.monotonic() + self.ttl
+        return self.value
+
+popular_users = PopularUsersCache()
+
+class FanOut(PeriodicTask):
+    failure_message = "Timeline trim failed"
+
+    def __init__(self, length: int = FEED_TIMELINE_LENGTH, interval: float = FEED_TRIM_INTERVAL_SECONDS):
+        super().__init__(interval)
+        self.length = length
+        self.pending = set()
+        self.dirty_user_ids = set()
+
+    def schedule(self, arts):
+        arts = [(art.id, art.owner_id, art.date) for art in arts if art.owner_id is not None]
+        if not arts:
+            return
+        task = asyncio.create_task(self.deliver(arts))
+        self.pending.add(task)
+        task.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task):
+        self.pending.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error("Feed fan-out failed", exc_info=task.exception())
+
+    async def deliver(self, arts):
+        user_ids = set()
+        async with AsyncSessionLocal() as db:
+            popular_ids = await popular_users.get(db)
+            for art_id, owner_id, date in arts:
+                # Popular accounts are merged into their followers' feeds at read time instead.
+                if owner_id not in popular_ids:
+                    user_ids.update(await crud.fan_out_art(db, art_id, owner_id, date))
+            await db.commit()
+        self.dirty_user_ids.update(user_ids)
+        return len(user_ids)
+
+    async def trim(self):
+        user_ids, self.dirty_user_ids = self.dirty_user_ids, set()
+        if not user_ids:
+            return 0
+        async with AsyncSessionLocal() as db:
+            removed = await crud.trim_timelines(db, user_ids, self.length)
+            await db.commit()
+        return removed
+
+    async def tick(self):
+        await self.trim()
+
+    async def drain(self):
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        await self.trim()
+
+fan_out = FanOut()
+
+async def get_feed(db: AsyncSession, user_id: int, limit: int = 20, cursor: Optional[str] = None):
+    before = crud.decode_cursor(cursor) if cursor else None
+    rows = list(await crud.get_timeline(db, user_id, limit, before))
+
+    followed_popular_ids = await crud.get_followee_ids(db, user_id, await popular_users.get(db))
+    if followed_popular_ids:
+        rows += await crud.get_owner_art_dates(db, followed_popular_ids, limit, before)
+        rows.sort(key=lambda row: (row.date, row.id), reverse=True)
+
+    page = []
+    seen = set()
+    for row in rows:
+        if row.id not in seen:
+            seen.add(row.id)
+            page.append(row)
+    page = page[:limit]
+    next_cursor = crud.encode_cursor(page[-1]) if page and len(page) == limit else None
+    return [row.id for row in page], next_cursor
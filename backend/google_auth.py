@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from fastapi import HTTPException
+import threading
+import hashlib
+import httpx
+import time
+import os
+
+GOOGLE_USERINFO_URL = os.environ.get("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v2/userinfo")
+GOOGLE_TIMEOUT_SECONDS = float(os.environ.get("GOOGLE_TIMEOUT_SECONDS", 5))
+GOOGLE_MAX_CONNECTIONS = int(os.environ.get("GOOGLE_MAX_CONNECTIONS", 50))
+GOOGLE_TOKEN_CACHE_SIZE = int(os.environ.get("GOOGLE_TOKEN_CACHE_SIZE", 10000))
+GOOGLE_TOKEN_CACHE_TTL_SECONDS = float(os.environ.get("GOOGLE_TOKEN_CACHE_TTL_SECONDS", 300))
+
+http_client = None
+
+def get_client():
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GOOGLE_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=GOOGLE_MAX_CONNECTIONS, max_keepalive_connections=GOOGLE_MAX_CONNECTIONS),
+        )
+    return http_client
+
+async def close():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+class TokenCache:
+    def __init__(self, size: int = GOOGLE_TOKEN_CACHE_SIZE, ttl: float = GOOGLE_TOKEN_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, access_token: str):
+        # Only a digest of the token is kept in memory.
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+    def get(self, access_token: str):
+        key = self.key(access_token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, user_info = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return user_info
+
+    def put(self, access_token: str, user_info):
+        key = self.key(access_token)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, user_info)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+token_cache = TokenCache()
+
+async def get_user_info(access_token: str):
+    user_info = token_cache.get(access_token)
+    if user_info is not None:
+        return user_info
+
+    try:
+        google_response = await get_client().get(GOOGLE_USERINFO_URL, headers={'Authorization': f'Bearer {access_token}'})
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Google auth timed out")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Google auth unavailable")
+
+    if google_response.status_code != 200:
+        raise HTTPException(status_code=google_response.status_code, detail="Google auth failed")
+
+    user_info = google_response.json()
+    token_cache.put(access_token, user_info)
+    return user_info
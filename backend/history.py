@@ -0,0 +1,151 @@
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from database import AsyncSessionLocal
+from search_cache import normalize_query
+from background import BufferedTask, PeriodicTask
+from typing import Optional
+import models
+import asyncio
+import logging
+import bisect
+import heapq
+import crud
+import os
+
+HISTORY_FLUSH_SIZE = int(os.environ.get("HISTORY_FLUSH_SIZE", 500))
+HISTORY_FLUSH_INTERVAL_SECONDS = float(os.environ.get("HISTORY_FLUSH_INTERVAL_SECONDS", 2.0))
+HISTORY_BUFFER_LIMIT = int(os.environ.get("HISTORY_BUFFER_LIMIT", 50000))
+SUGGEST_SIZE = int(os.environ.get("SUGGEST_SIZE", 20000))
+SUGGEST_MIN_COUNT = int(os.environ.get("SUGGEST_MIN_COUNT", 2))
+SUGGEST_WINDOW_DAYS = float(os.environ.get("SUGGEST_WINDOW_DAYS", 30))
+SUGGEST_REFRESH_SECONDS = float(os.environ.get("SUGGEST_REFRESH_SECONDS", 300))
+SUGGEST_LIMIT = 10
+SUGGEST_CACHED_PREFIX_LENGTH = 3
+
+logger = logging.getLogger(__name__)
+
+class HistoryLogger(BufferedTask):
+    failure_message = "History flush failed"
+
+    def __init__(self, flush_size: int = HISTORY_FLUSH_SIZE, interval: float = HISTORY_FLUSH_INTERVAL_SECONDS, limit: int = HISTORY_BUFFER_LIMIT):
+        super().__init__(interval)
+        self.flush_size = flush_size
+        self.limit = limit
+        self.searches = []
+        self.views = []
+        self.dropped = 0
+
+    def _added(self):
+        if len(self.searches) + len(self.views) >= self.flush_size:
+            self.full.set()
+
+    def log_search(self, query: str, user_id: Optional[int] = None):
+        if len(self.searches) >= self.limit:
+            self.dropped += 1
+            return
+        self.searches.append({"query": normalize_query(query), "user_id": user_id, "date": datetime.utcnow()})
+        self._added()
+
+    def log_view(self, art_id: int, user_id: Optional[int] = None):
+        if len(self.views) >= self.limit:
+            self.dropped += 1
+            return
+        self.views.append({"art_id": art_id, "user_id": user_id, "date": datetime.utcnow()})
+        self._added()
+
+    async def flush(self):
+        searches, views = self.searches, self.views
+        self.searches, self.views = [], []
+        self.full.clear()
+        if not searches and not views:
+            return 0
+        try:
+            await self.write(searches, views)
+        except IntegrityError:
+            # One unknown user or art id fails the whole insert; keep the events without the dangling references.
+            logger.warning("History batch referenced unknown users or arts; writing it without them")
+            await self.write(*await self.known_references(searches, views))
+        except Exception:
+            # History is best effort: requeue what fits under the buffer limit and drop the rest.
+            self.searches = (searches + self.searches)[-self.limit:]
+            self.views = (views + self.views)[-self.limit:]
+            raise
+        return len(searches) + len(views)
+
+    async def write(self, searches, views):
+        async with AsyncSessionLocal() as db:
+            await crud.add_history(db, searches, views)
+            await db.commit()
+
+    async def known_references(self, searches, views):
+        async with AsyncSessionLocal() as db:
+            user_ids = await crud.get_existing_ids(db, models.User.id, [row["user_id"] for row in searches + views])
+            art_ids = await crud.get_existing_ids(db, models.Art.id, [row["art_id"] for row in views])
+        searches = [{**row, "user_id": row["user_id"] if row["user_id"] in user_ids else None} for row in searches]
+        views = [
+            {**row, "user_id": row["user_id"] if row["user_id"] in user_ids else None}
+            for row in views if row["art_id"] in art_ids
+        ]
+        return searches, views
+
+    async def tick(self):
+        try:
+            await self.flush()
+        finally:
+            if self.dropped:
+                logger.warning("Dropped %d history events while the buffer was full", self.dropped)
+                self.dropped = 0
+
+history_logger = HistoryLogger()
+
+class PrefixIndex:
+    def __init__(self, counts=()):
+        entries = sorted(counts)
+        self.queries = [query for query, _ in entries]
+        self.counts = [count for _, count in entries]
+        # Short prefixes match large ranges, so their answers are ranked once up front.
+        self.top = {}
+        for query, _ in sorted(entries, key=lambda entry: (-entry[1], entry[0])):
+            for length in range(1, min(len(query), SUGGEST_CACHED_PREFIX_LENGTH) + 1):
+                top = self.top.setdefault(query[:length], [])
+                if len(top) < SUGGEST_LIMIT:
+                    top.append(query)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT):
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+        if prefix in self.top and limit <= SUGGEST_LIMIT:
+            return self.top[prefix][:limit]
+        start = bisect.bisect_left(self.queries, prefix)
+        end = bisect.bisect_left(self.queries, prefix + "\uffff", start)
+        best = heapq.nsmallest(limit, range(start, end), key=lambda position: -self.counts[position])
+        return [self.queries[position] for position in best]
+
+class SuggestIndex(PeriodicTask):
+    failure_message = "Suggestion index refresh failed"
+
+    def __init__(self, size: int = SUGGEST_SIZE, min_count: int = SUGGEST_MIN_COUNT, window_days: float = SUGGEST_WINDOW_DAYS, interval: float = SUGGEST_REFRESH_SECONDS):
+        super().__init__(interval)
+        self.size = size
+        self.min_count = min_count
+        self.window_days = window_days
+        self.index = PrefixIndex()
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT):
+        return self.index.suggest(prefix, limit)
+
+    async def refresh(self):
+        async with AsyncSessionLocal() as db:
+            rows = await crud.get_popular_queries(db, datetime.utcnow() - timedelta(days=self.window_days), self.min_count, self.size)
+        index = await asyncio.to_thread(PrefixIndex, [(query, count) for query, count in rows])
+        self.index = index
+        return len(index)
+
+    async def tick(self):
+        await self.refresh()
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,194 @@
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from vector_store import get_prompts_collection
+from embeddings import get_embedding_function
+from vector_index import prompt_index, VECTOR_INDEX_ENABLED
+from classifier import category_classifier
+from search_cache import search_cache, art_cache
+from category_counts import top_categories_cache
+from metrics import span
+from background import BackgroundTask
+import models, crud
+import asyncio
+import logging
+import time
+import os
+
+INDEXER_BATCH_SIZE = int(os.environ.get("INDEXER_BATCH_SIZE", 64))
+INDEXER_LINGER_SECONDS = float(os.environ.get("INDEXER_LINGER_SECONDS", 0.5))
+INDEXER_POLL_SECONDS = float(os.environ.get("INDEXER_POLL_SECONDS", 5))
+INDEXER_IN_PROCESS = os.environ.get("INDEXER_IN_PROCESS", "1") == "1"
+INDEXER_MAX_ATTEMPTS = int(os.environ.get("INDEXER_MAX_ATTEMPTS", 3))
+INDEXER_RETRY_BACKOFF_SECONDS = float(os.environ.get("INDEXER_RETRY_BACKOFF_SECONDS", 0.5))
+
+PENDING = "pending"
+INDEXED = "indexed"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+def pending_art_ids(db: Session, limit: int = INDEXER_BATCH_SIZE):
+    rows = (
+        db.query(models.Art.id)
+        .filter(models.Art.index_status == PENDING)
+        .order_by(models.Art.id)
+        .limit(limit)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+def index_batch(db: Session, art_ids):
+    arts = (
+        db.query(models.Art)
+        .filter(models.Art.id.in_(art_ids), models.Art.index_status == PENDING)
+        .order_by(models.Art.id)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not arts:
+        db.rollback()
+        return []
+
+    ids = [art.id for art in arts]
+    prompts = [art.prompt for art in arts]
+    with span("embedding"):
+        embeddings = get_embedding_function()(prompts)
+    with span("chroma_add"):
+        get_prompts_collection().upsert(ids=[str(id_) for id_ in ids], documents=prompts, embeddings=embeddings)
+    if VECTOR_INDEX_ENABLED:
+        with span("vector_index_append"):
+            try:
+                prompt_index.append(ids, embeddings, get_prompts_collection())
+            except Exception:
+                # Chroma already has the rows; searches fall back to it until the index is snapshotted again.
+                logger.exception("Could not append %d vectors to the prompt index", len(ids))
+                prompt_index.mark_incomplete()
+
+    associations = [
+        {"art_id": art_id, "category_id": category_id}
+        for art_id, category_ids in zip(ids, category_classifier.classify(embeddings))
+        for category_id in category_ids
+    ]
+    with span("db"):
+        crud.add_art_categories(db, associations)
+        db.query(models.Art).filter(models.Art.id.in_(ids)).update({models.Art.index_status: INDEXED}, synchronize_session=False)
+        db.commit()
+    search_cache.bump()
+    art_cache.invalidate(ids)
+    top_categories_cache.invalidate()
+    return ids
+
+def index_with_retries(art_ids, attempts: int = INDEXER_MAX_ATTEMPTS):
+    for attempt in range(1, attempts + 1):
+        db = SessionLocal()
+        try:
+            return index_batch(db, art_ids)
+        except Exception as e:
+            db.rollback()
+            if attempt == attempts:
+                raise
+            delay = INDEXER_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            logger.warning("Indexing attempt %d/%d for %d arts failed, retrying in %.1fs: %r", attempt, attempts, len(art_ids), delay, e)
+            time.sleep(delay)
+        finally:
+            db.close()
+
+def mark_failed(art_ids):
+    try:
+        db = SessionLocal()
+        try:
+            db.query(models.Art).filter(models.Art.id.in_(art_ids), models.Art.index_status == PENDING).update({models.Art.index_status: FAILED}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+    except Exception:
+        # Usually the same outage that failed the batch; the arts stay pending for the next startup or worker poll.
+        logger.exception("Could not mark %d arts as failed", len(art_ids))
+        return
+    art_cache.invalidate(art_ids)
+
+def index_arts(art_ids):
+    try:
+        indexed = index_with_retries(art_ids)
+        logger.info("Indexed %d arts", len(indexed))
+        return indexed
+    except Exception:
+        if len(art_ids) == 1:
+            logger.exception("Indexing failed for art %s", art_ids[0])
+            mark_failed(art_ids)
+            return []
+        logger.exception("Indexing failed for %d arts, retrying them one at a time", len(art_ids))
+
+    # Isolate the arts that keep failing so they do not take the rest of the batch with them.
+    indexed = []
+    for art_id in art_ids:
+        try:
+            indexed += index_with_retries([art_id], attempts=1)
+        except Exception:
+            logger.exception("Indexing failed for art %s", art_id)
+            mark_failed([art_id])
+    logger.info("Indexed %d of %d arts one at a time", len(indexed), len(art_ids))
+    return indexed
+
+class IndexingQueue(BackgroundTask):
+    def __init__(self, batch_size: int = INDEXER_BATCH_SIZE, linger: float = INDEXER_LINGER_SECONDS):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queue = asyncio.Queue()
+
+    def enqueue(self, art_id: int):
+        # Without a running worker the art stays pending for the standalone indexer or the next startup.
+        if self.running():
+            self.queue.put_nowait(art_id)
+
+    async def start(self):
+        for art_id in await asyncio.to_thread(self._pending):
+            self.queue.put_nowait(art_id)
+        await super().start()
+
+    def _pending(self):
+        db = SessionLocal()
+        try:
+            return pending_art_ids(db, limit=None)
+        finally:
+            db.close()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            art_ids = [await self.queue.get()]
+            deadline = loop.time() + self.linger
+            while len(art_ids) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    art_ids.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(index_arts, art_ids)
+            except Exception:
+                logger.exception("Indexing %d arts failed; they stay pending", len(art_ids))
+
+indexing_queue = IndexingQueue()
+
+def run_worker():
+    while True:
+        try:
+            db = SessionLocal()
+            try:
+                art_ids = pending_art_ids(db)
+            finally:
+                db.close()
+            if art_ids:
+                index_arts(art_ids)
+                continue
+        except Exception:
+            logger.exception("Indexer poll failed")
+        time.sleep(INDEXER_POLL_SECONDS)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    category_classifier.load()
+    run_worker()
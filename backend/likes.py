@@ -0,0 +1,78 @@
+from collections import Counter
+from sqlalchemy import func, select
+from database import AsyncSessionLocal, SessionLocal
+from search_cache import art_cache
+from background import BufferedTask, PeriodicTask
+import asyncio
+import logging
+import crud
+import os
+
+LIKES_FLUSH_SIZE = int(os.environ.get("LIKES_FLUSH_SIZE", 1000))
+LIKES_FLUSH_INTERVAL_SECONDS = float(os.environ.get("LIKES_FLUSH_INTERVAL_SECONDS", 1.0))
+TRENDING_INTERVAL_SECONDS = float(os.environ.get("TRENDING_INTERVAL_SECONDS", 300))
+TRENDING_WINDOW_HOURS = float(os.environ.get("TRENDING_WINDOW_HOURS", 72))
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", 12))
+TRENDING_SIZE = int(os.environ.get("TRENDING_SIZE", 1000))
+TRENDING_LOCK_ID = 0x7472656e64
+
+logger = logging.getLogger(__name__)
+
+class LikeCounter(BufferedTask):
+    failure_message = "Like count flush failed"
+
+    def __init__(self, flush_size: int = LIKES_FLUSH_SIZE, interval: float = LIKES_FLUSH_INTERVAL_SECONDS):
+        super().__init__(interval)
+        self.flush_size = flush_size
+        self.deltas = Counter()
+
+    def add(self, art_id: int, delta: int):
+        self.deltas[art_id] += delta
+        if len(self.deltas) >= self.flush_size:
+            self.full.set()
+
+    def pending(self, art_id: int):
+        return self.deltas.get(art_id, 0)
+
+    async def flush(self):
+        deltas, self.deltas = self.deltas, Counter()
+        self.full.clear()
+        if not deltas:
+            return 0
+        try:
+            async with AsyncSessionLocal() as db:
+                await crud.adjust_like_counts(db, deltas)
+                await db.commit()
+        except Exception:
+            # Keep the deltas so the next flush retries them.
+            self.deltas.update(deltas)
+            raise
+        art_cache.invalidate(deltas)
+        return len(deltas)
+
+like_counter = LikeCounter()
+
+def refresh_trending(window_hours: float = TRENDING_WINDOW_HOURS, half_life_hours: float = TRENDING_HALF_LIFE_HOURS, size: int = TRENDING_SIZE):
+    db = SessionLocal()
+    try:
+        # Every app worker runs this loop; only one of them recomputes at a time.
+        if not db.execute(select(func.pg_try_advisory_xact_lock(TRENDING_LOCK_ID))).scalar():
+            return None
+        ranked = crud.rebuild_trending(db, window_hours, half_life_hours, size)
+        db.commit()
+        return ranked
+    finally:
+        db.close()
+
+class TrendingJob(PeriodicTask):
+    failure_message = "Trending refresh failed"
+
+    def __init__(self, interval: float = TRENDING_INTERVAL_SECONDS):
+        super().__init__(interval)
+
+    async def tick(self):
+        ranked = await asyncio.to_thread(refresh_trending)
+        if ranked is not None:
+            logger.info("Ranked %d trending arts", ranked)
+
+trending_job = TrendingJob()
@@ -1,160 +1,302 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Form, Body
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Form, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-from sqlalchemy import select, case, func
-import schemas, models, crud
-from database import SessionLocal, engine
-from typing import List, Any
-import chromadb
+from fastapi.responses import StreamingResponse, ORJSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+import schemas, models, crud, storage, derivatives, search, activity, serializers, metrics, embeddings, warmup, google_auth, feed, likes, history, similar
+from database import async_engine, read_async_engine, get_db, get_read_db, mark_write
+from typing import List, Optional, Literal
+from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
 import logging
-import shutil
-import uuid
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-import requests
-import httpx
-import os
-
-models.Base.metadata.create_all(bind=engine)
-embedding_function = OpenAIEmbeddingFunction(api_key=os.environ.get('OPENAI_API_KEY'), model_name="text-embedding-ada-002")
-chroma_client = chromadb.PersistentClient(path="./chroma_data")
-collection_prompts = chroma_client.get_or_create_collection(name="Prompts", embedding_function=embedding_function)
-collection_categories = chroma_client.get_collection(name="Categories", embedding_function=embedding_function)
+from indexer import indexing_queue, INDEXER_IN_PROCESS
+from search_cache import search_cache, art_cache
+from category_counts import top_categories_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    derivatives.start()
+    await warmup.warm_up()
+    google_auth.get_client()
+    if INDEXER_IN_PROCESS:
+        if warmup.is_ready("database", "chroma", "categories"):
+            await indexing_queue.start()
+        else:
+            logger.warning("In-process indexer not started; new arts stay pending until a worker runs")
+    await feed.fan_out.start()
+    await likes.like_counter.start()
+    await likes.trending_job.start()
+    await history.history_logger.start()
+    await history.suggest_index.start()
+    await similar.precompute_job.start()
+    yield
+    await indexing_queue.stop()
+    await feed.fan_out.stop()
+    await likes.like_counter.stop()
+    await likes.trending_job.stop()
+    await history.history_logger.stop()
+    await history.suggest_index.stop()
+    await similar.precompute_job.stop()
+    await google_auth.close()
+    derivatives.shutdown()
+    await async_engine.dispose()
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
 
-app.mount("/images", StaticFiles(directory="images"), name="images")
+app = FastAPI(lifespan=lifespan)
+
+app.mount(storage.IMAGES_URL, StaticFiles(directory=storage.IMAGES_DIR, check_dir=False), name="images")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def filter_chroma(results, threshold = 0.47):
-    int_ids = [int(id_) for id_ in results["ids"][0]]
-    distances = results["distances"][0]
-    filtered_ids = [id_ for id_, distance in zip(int_ids, distances) if distance < threshold]
+async def load_arts(db: AsyncSession, art_ids):
+    arts = art_cache.get_many(art_ids)
+    missing_ids = [id_ for id_ in art_ids if id_ not in arts]
+    if missing_ids:
+        with metrics.span("db"):
+            rows = await crud.get_art_rows(db, missing_ids)
+            category_names = await crud.get_category_names(db, missing_ids)
+        for art in serializers.art_list(rows, category_names):
+            arts[art["id"]] = art_cache.put(art)
+    return [arts[id_] for id_ in art_ids if id_ in arts]
 
-    return filtered_ids
+@app.get("/ready")
+async def read_readiness():
+    status_code = 200 if warmup.is_ready() else 503
+    return ORJSONResponse({"ready": status_code == 200, "checks": warmup.checks}, status_code=status_code)
 
 @app.post("/arts/", response_model=schemas.Art)
-async def create_art(prompt: str = Form(...), image: UploadFile = File(...), owner_id: int = Form(...), db: Session = Depends(get_db)): 
-    file_extension = image.filename.split(".")[-1]
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    image_path = f"./images/{unique_filename}"
-
-    with open(image_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-    
-    url_path = f"/images/{unique_filename}"
-    db_art = models.Art(prompt=prompt, image=url_path, owner_id=owner_id)
-    db.add(db_art)
-    db.commit()
-    db.refresh(db_art)
-
-    collection_prompts.add(
-        documents=[prompt],
-        ids=[str(db_art.id)]
-    )
-
-    results = collection_categories.query(query_texts=[prompt], include=["distances", "documents"])
-    print(results)
-    filtered_ids = filter_chroma(results, 0.35)
-
-    if(filtered_ids):
-        associations = [{"art_id": db_art.id, "category_id": category_id} for category_id in filtered_ids]
-        db.execute(models.art_categories.insert(), associations)
-        db.commit()
+async def create_art(response: Response, prompt: str = Form(...), image: UploadFile = File(...), owner_id: int = Form(...), db: AsyncSession = Depends(get_db)):
+    with metrics.span("file_write"):
+        url_path = await storage.save_upload(image)
+    with metrics.span("db"):
+        db_art = models.Art(prompt=prompt, image=url_path, owner_id=owner_id)
+        db.add(db_art)
+        await db.flush()
+        await crud.record_art_activity(db, [db_art])
+        await db.commit()
+    mark_write(response)
+    search_cache.bump()
+
+    if INDEXER_IN_PROCESS:
+        indexing_queue.enqueue(db_art.id)
+    derivatives.schedule(url_path)
+    feed.fan_out.schedule([db_art])
+
+    return db_art
+
+@app.post("/arts/bulk/", response_model=schemas.BulkArtResult)
+async def create_arts_bulk(response: Response, prompts: List[str] = Form(...), images: List[UploadFile] = File(...), owner_id: int = Form(...), db: AsyncSession = Depends(get_db)):
+    if len(prompts) != len(images):
+        raise HTTPException(status_code=400, detail="Expected one prompt per image")
+    if len(images) > storage.MAX_BULK_UPLOADS:
+        raise HTTPException(status_code=413, detail=f"At most {storage.MAX_BULK_UPLOADS} images per upload")
+
+    errors = []
+    accepted = []
+    for index, (prompt, image) in enumerate(zip(prompts, images)):
+        if not prompt.strip():
+            errors.append(schemas.BulkArtError(index=index, filename=image.filename, detail="Prompt is empty"))
+        elif not await storage.is_image_upload(image):
+            errors.append(schemas.BulkArtError(index=index, filename=image.filename, detail="Not a supported image"))
+        else:
+            accepted.append(index)
+    with metrics.span("file_write"):
+        saved = await asyncio.gather(*(storage.save_upload(images[index]) for index in accepted), return_exceptions=True)
+
+    rows = []
+    date = datetime.utcnow()
+    for index, url_path in zip(accepted, saved):
+        if isinstance(url_path, BaseException):
+            detail = url_path.detail if isinstance(url_path, HTTPException) else "Could not store image"
+            errors.append(schemas.BulkArtError(index=index, filename=images[index].filename, detail=detail))
+        else:
+            rows.append({"prompt": prompts[index], "image": url_path, "owner_id": owner_id, "date": date})
+    errors.sort(key=lambda error: error.index)
 
+    arts = []
+    if rows:
+        with metrics.span("db"):
+            arts = await crud.create_arts(db, rows)
+            await crud.record_art_activity(db, arts)
+            await db.commit()
+        mark_write(response)
+        search_cache.bump()
+
+        if INDEXER_IN_PROCESS:
+            for art in arts:
+                indexing_queue.enqueue(art.id)
+        for url_path in dict.fromkeys(art.image for art in arts):
+            derivatives.schedule(url_path)
+        feed.fan_out.schedule(arts)
+
+    return schemas.BulkArtResult(arts=[schemas.Art.model_validate(art) for art in arts], errors=errors)
+
+@app.get("/derivatives/{name}")
+async def read_derivative(name: str, request: Request):
+    return await derivatives.serve(name, request)
+
+@app.get("/arts/{art_id}/status/", response_model=schemas.ArtIndexStatus)
+async def read_art_index_status(art_id: int, db: AsyncSession = Depends(get_read_db)):
+    db_art = await db.get(models.Art, art_id)
+    if db_art is None:
+        raise HTTPException(status_code=404, detail="Art not found")
     return db_art
 
-@app.get("/arts/", response_model=List[schemas.Art])
-async def read_arts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    arts = db.query(models.Art).offset(skip).limit(limit).all()
-    return arts
-
-@app.get("/search/", response_model=List[schemas.Art])
-async def search_arts(query: str, db: Session = Depends(get_db)):
-    results = collection_prompts.query(query_texts=[query], include=["distances"])  
-    
-    filtered_ids = filter_chroma(results)
-    
+@app.get("/arts/", response_model=List[schemas.Art], response_class=ORJSONResponse)
+async def read_arts(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    with metrics.span("db"):
+        try:
+            rows, next_cursor = await crud.get_arts(db, skip=skip, limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        category_names = await crud.get_category_names(db, [row.id for row in rows])
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    with metrics.span("serialization"):
+        return ORJSONResponse(serializers.art_list(rows, category_names), headers=headers)
+
+@app.get("/arts/trending/", response_model=List[schemas.Art], response_class=ORJSONResponse)
+async def read_trending_arts(limit: int = 50, db: AsyncSession = Depends(get_read_db)):
+    with metrics.span("db"):
+        art_ids = await crud.get_trending_ids(db, limit)
+    arts = await load_arts(db, art_ids)
+    with metrics.span("serialization"):
+        return ORJSONResponse(arts)
+
+@app.post("/arts/{art_id}/like/", response_model=schemas.LikeStatus)
+async def like_art(art_id: int, response: Response, user_id: int = Body(..., embed=True), db: AsyncSession = Depends(get_db)):
+    return await set_like(db, response, art_id, user_id, True)
+
+@app.delete("/arts/{art_id}/like/", response_model=schemas.LikeStatus)
+async def unlike_art(art_id: int, response: Response, user_id: int = Body(..., embed=True), db: AsyncSession = Depends(get_db)):
+    return await set_like(db, response, art_id, user_id, False)
+
+async def set_like(db: AsyncSession, response: Response, art_id: int, user_id: int, liked: bool):
+    with metrics.span("db"):
+        like_count = await crud.get_like_count(db, art_id)
+        if like_count is None:
+            raise HTTPException(status_code=404, detail="Art not found")
+        try:
+            changed = await (crud.add_like if liked else crud.remove_like)(db, user_id, art_id)
+            await db.commit()
+        except IntegrityError:
+            raise HTTPException(status_code=404, detail="User not found")
+    if changed:
+        # The art row is only touched by the batched flush, so hot arts do not serialize on it.
+        likes.like_counter.add(art_id, 1 if liked else -1)
+        mark_write(response)
+    return schemas.LikeStatus(art_id=art_id, liked=liked, like_count=like_count + likes.like_counter.pending(art_id))
+
+@app.get("/search/", response_model=List[schemas.Art], response_class=ORJSONResponse)
+async def search_arts(query: str, mode: Literal[search.SEARCH_MODES] = search.SEARCH_DEFAULT_MODE, user_id: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
+    history.history_logger.log_search(query, user_id)
+    filtered_ids = search_cache.get(query, mode)
+    if filtered_ids is None:
+        generation = search_cache.generation
+        filtered_ids, complete = await search.ranked_ids(db, query, mode)
+        if complete:
+            search_cache.put(query, mode, filtered_ids, generation)
+
     if not filtered_ids:
-        return []
-    order_case = case({id_: index for index, id_ in enumerate(filtered_ids)}, value=models.Art.id)
-    arts = db.query(models.Art).filter(models.Art.id.in_(filtered_ids)).order_by(order_case).all()
-    
-    return arts
+        return ORJSONResponse([])
+
+    arts = await load_arts(db, filtered_ids)
+    with metrics.span("serialization"):
+        return ORJSONResponse(arts)
+
+@app.get("/search/suggest/", response_model=List[str])
+async def suggest_searches(prefix: str, limit: int = history.SUGGEST_LIMIT):
+    return history.suggest_index.suggest(prefix, limit)
+
+@app.get("/feed/", response_model=List[schemas.Art], response_class=ORJSONResponse)
+async def read_feed(user_id: int, limit: int = 20, cursor: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    with metrics.span("db"):
+        try:
+            art_ids, next_cursor = await feed.get_feed(db, user_id, limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    arts = await load_arts(db, art_ids)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    with metrics.span("serialization"):
+        return ORJSONResponse(arts, headers=headers)
 
 @app.post("/auth/google", response_model=schemas.User)
 async def google_authenticate(
-    access_token: str = Body(..., embed=True), 
-    db: Session = Depends(get_db)
+    response: Response,
+    access_token: str = Body(..., embed=True),
+    db: AsyncSession = Depends(get_db)
 ):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            'https://www.googleapis.com/oauth2/v2/userinfo',
-            headers={'Authorization': f'Bearer {access_token}'})
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail="Google auth failed")
-
-    google_user_info = response.json()
-    
-    user = db.query(models.User).filter(models.User.email == google_user_info["email"]).first()
-    if user:
-        user.google_id = google_user_info["id"]
-        user.picture = google_user_info["picture"]
-    else:
-        user = models.User(
-            email=google_user_info["email"],
-            username=google_user_info["name"],
-            picture=google_user_info["picture"],
-            description="",
-            google_id=google_user_info["id"],
-        )
-        db.add(user)
-
-    db.commit()
-    db.refresh(user)
+    google_user_info = await google_auth.get_user_info(access_token)
+
+    user = await db.scalar(select(models.User).where(models.User.email == google_user_info["email"]))
+    if user and user.google_id == google_user_info["id"] and user.picture == google_user_info["picture"]:
+        return user
+
+    user = await crud.upsert_google_user(db, google_user_info)
+    await db.commit()
+    mark_write(response)
 
     return user
 
-@app.get("/arts/dates/", response_model=List[str])
-async def read_art_dates(db: Session = Depends(get_db)):
-    art_dates = db.query(models.Art.date).all()
-    print(art_dates)
-    dates = [art_date[0].strftime("%Y-%m-%d %H:%M:%S") for art_date in art_dates]
-    return dates
+@app.get("/arts/activity/", response_model=List[schemas.ActivityBucket])
+async def read_art_activity(
+    bucket: Literal["hour", "day", "week"] = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    owner_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    rows = await crud.get_art_activity(db, bucket=bucket, start=start, end=end, owner_id=owner_id)
+    return [schemas.ActivityBucket(bucket=row.bucket, count=row.count) for row in rows]
+
+@app.get("/arts/dates/")
+async def read_art_dates():
+    return StreamingResponse(activity.stream_art_dates(), media_type="application/x-ndjson")
+
+@app.get("/embeddings/stats/")
+async def read_embedding_stats():
+    return embeddings.stats()
+
+@app.get("/metrics")
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/categories/top/", response_model=List[schemas.CategoryCount])
-async def read_top_categories(db: Session = Depends(get_db)):
-    categories_counts = (
-        db.query(
-            models.Category.name, 
-            func.count(models.art_categories.c.art_id).label("count")
-        )
-        .join(models.art_categories, models.art_categories.c.category_id == models.Category.id)
-        .group_by(models.Category.name)
-        .order_by(func.count(models.art_categories.c.art_id).desc())
-        .limit(10)
-        .all()
-    )
-
-    categories = [category_count[0] for category_count in categories_counts]
-    counts = [category_count[1] for category_count in categories_counts]
-
-    response = [schemas.CategoryCount(name=category, count=count) for category, count in zip(categories, counts)]
-    return response
\ No newline at end of file
+async def read_top_categories(db: AsyncSession = Depends(get_read_db)):
+    return await top_categories_cache.get(db)
+
+@app.get("/arts/{art_id}/", response_model=schemas.Art, response_class=ORJSONResponse)
+async def read_art(art_id: int, user_id: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
+    arts = await load_arts(db, [art_id])
+    if not arts:
+        raise HTTPException(status_code=404, detail="Art not found")
+    history.history_logger.log_view(art_id, user_id)
+    with metrics.span("serialization"):
+        return ORJSONResponse(arts[0])
+
+@app.get("/arts/{art_id}/similar/", response_model=List[schemas.Art], response_class=ORJSONResponse)
+async def read_similar_arts(art_id: int, limit: int = similar.SIMILAR_LIMIT, db: AsyncSession = Depends(get_read_db)):
+    art_ids = await similar.get_similar_ids(art_id, limit)
+    if art_ids is None:
+        if await db.get(models.Art, art_id) is None:
+            raise HTTPException(status_code=404, detail="Art not found")
+        art_ids = []
+
+    arts = await load_arts(db, art_ids)
+    with metrics.span("serialization"):
+        return ORJSONResponse(arts)
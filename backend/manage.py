@@ -0,0 +1,261 @@
+from concurrent.futures import ThreadPoolExecutor
+from database import SessionLocal
+import models
+import argparse
+import logging
+import json
+import time
+import os
+
+REINDEX_BATCH_SIZE = 256
+REINDEX_CONCURRENCY = 4
+REINDEX_CHECKPOINT_PATH = "./reindex_checkpoint.json"
+CHROMA_PAGE_SIZE = 5000
+
+logger = logging.getLogger("manage")
+
+def run_with_session(job, *args):
+    db = SessionLocal()
+    try:
+        return job(db, *args)
+    finally:
+        db.close()
+
+def seed_categories(args):
+    import seed
+
+    if args.recreate:
+        import vector_store
+
+        vector_store.drop_collection("Categories")
+    created = run_with_session(seed.create_categories, seed.CATEGORIES)
+    logger.info("Seeded %d new categories (%d total)", created, len(seed.CATEGORIES))
+
+def load_checkpoint(path, model_name):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("model") != model_name:
+        logger.info("Ignoring checkpoint for model %s", checkpoint.get("model"))
+        return 0
+    return checkpoint["last_id"]
+
+def save_checkpoint(path, model_name, last_id):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"model": model_name, "last_id": last_id}, f)
+    os.replace(temp_path, path)
+
+def indexed_arts(db, after_id, limit):
+    return (
+        db.query(models.Art.id, models.Art.prompt)
+        .filter(models.Art.id > after_id, models.Art.index_status == "indexed")
+        .order_by(models.Art.id)
+        .limit(limit)
+        .all()
+    )
+
+def chroma_ids(collection):
+    ids = set()
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=CHROMA_PAGE_SIZE, offset=offset)["ids"]
+        ids.update(int(id_) for id_ in page)
+        if len(page) < CHROMA_PAGE_SIZE:
+            return ids
+        offset += len(page)
+
+def diff_prompts(args):
+    from vector_store import get_prompts_collection
+
+    db = SessionLocal()
+    try:
+        postgres_ids = {art_id for (art_id,) in db.query(models.Art.id).filter(models.Art.index_status == "indexed")}
+    finally:
+        db.close()
+    stored_ids = chroma_ids(get_prompts_collection())
+
+    missing = sorted(postgres_ids - stored_ids)
+    orphaned = sorted(stored_ids - postgres_ids)
+    print(json.dumps({
+        "postgres_indexed": len(postgres_ids),
+        "chroma": len(stored_ids),
+        "missing_in_chroma": len(missing),
+        "orphaned_in_chroma": len(orphaned),
+        "missing_sample": missing[:20],
+        "orphaned_sample": orphaned[:20],
+    }, indent=2))
+
+def reindex_prompts(args):
+    if args.dry_run:
+        return diff_prompts(args)
+
+    import vector_store, embeddings
+
+    if args.recreate:
+        vector_store.drop_collection("Prompts")
+        args.restart = True
+    collection = vector_store.get_prompts_collection()
+    # A batcher of its own, so --batch-size and --concurrency shape the provider calls rather than the app defaults.
+    embed, _ = embeddings.create_embedding_function(max_batch=args.batch_size, max_concurrency=args.concurrency)
+    model_name = vector_store.EMBEDDING_MODEL
+
+    if args.retry_failed:
+        db = SessionLocal()
+        try:
+            retried = db.query(models.Art).filter(models.Art.index_status == "failed").update({models.Art.index_status: "pending"}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        logger.info("Queued %d failed arts for the indexer", retried)
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    last_id = load_checkpoint(args.checkpoint, model_name)
+    if last_id:
+        logger.info("Resuming after art %d", last_id)
+
+    window = args.batch_size * args.concurrency
+    total = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        while True:
+            db = SessionLocal()
+            try:
+                arts = indexed_arts(db, last_id, window)
+            finally:
+                db.close()
+            if not arts:
+                break
+
+            batches = [arts[start:start + args.batch_size] for start in range(0, len(arts), args.batch_size)]
+            embeddings = pool.map(lambda batch: embed([prompt for _, prompt in batch]), batches)
+            for batch, batch_embeddings in zip(batches, embeddings):
+                collection.upsert(
+                    ids=[str(art_id) for art_id, _ in batch],
+                    documents=[prompt for _, prompt in batch],
+                    embeddings=batch_embeddings,
+                )
+
+            last_id = arts[-1][0]
+            save_checkpoint(args.checkpoint, model_name, last_id)
+            total += len(arts)
+            logger.info("Reindexed %d prompts (up to art %d, %.1f/s)", total, last_id, total / (time.monotonic() - started))
+
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    logger.info("Reindex complete: %d prompts", total)
+    snapshot_vectors(args)
+
+def snapshot_vectors(args):
+    from vector_store import get_prompts_collection
+    from vector_index import prompt_index
+
+    prompt_index.build(get_prompts_collection(), getattr(args, "dtype", None))
+
+def recategorize(args):
+    from classifier import recategorize_arts
+
+    total = run_with_session(recategorize_arts, args.chunk_size)
+    logger.info("Recategorized %d arts", total)
+
+def rebuild_category_counts(args):
+    import crud
+
+    run_with_session(crud.rebuild_category_counts)
+    logger.info("Rebuilt category counts from art_categories")
+
+def rebuild_activity(args):
+    import crud
+
+    run_with_session(crud.rebuild_art_activity)
+    logger.info("Rebuilt art_activity from arts")
+
+def rebuild_timelines(args):
+    import crud
+
+    run_with_session(crud.rebuild_timelines, args.length, args.popular_followers)
+    logger.info("Rebuilt follower timelines")
+
+def refresh_trending(args):
+    import crud, likes
+
+    if args.rebuild_counts:
+        run_with_session(crud.rebuild_like_counts)
+        logger.info("Rebuilt like counts from likes")
+    ranked = likes.refresh_trending(args.window_hours, args.half_life_hours, args.size)
+    if ranked is None:
+        logger.info("Trending refresh is already running elsewhere")
+    else:
+        logger.info("Ranked %d trending arts", ranked)
+
+def backfill_derivatives(args):
+    import derivatives
+
+    derivatives.backfill(args.workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance jobs for the database, the vector collections and stored images.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed-categories", help="Insert missing categories and embed them in one batch.")
+    seed_parser.add_argument("--recreate", action="store_true", help="Drop the collection first, e.g. after an embedding model change.")
+    seed_parser.set_defaults(func=seed_categories)
+
+    reindex_parser = commands.add_parser("reindex-prompts", help="Rebuild the Prompts collection from the arts table.")
+    reindex_parser.add_argument("--batch-size", type=int, default=REINDEX_BATCH_SIZE)
+    reindex_parser.add_argument("--concurrency", type=int, default=REINDEX_CONCURRENCY, help="Embedding requests in flight.")
+    reindex_parser.add_argument("--checkpoint", default=REINDEX_CHECKPOINT_PATH)
+    reindex_parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start from the first art.")
+    reindex_parser.add_argument("--recreate", action="store_true", help="Drop the collection first, e.g. after an embedding model change.")
+    reindex_parser.add_argument("--retry-failed", action="store_true", help="Hand arts that failed indexing back to the indexer.")
+    reindex_parser.add_argument("--dry-run", action="store_true", help="Only report differences between Postgres and Chroma.")
+    reindex_parser.set_defaults(func=reindex_prompts)
+
+    snapshot_parser = commands.add_parser("snapshot-vectors", help="Rewrite the memory-mapped prompt index from the Prompts collection.")
+    snapshot_parser.add_argument("--dtype", choices=["float32", "float16", "int8"])
+    snapshot_parser.set_defaults(func=snapshot_vectors)
+
+    from classifier import RECATEGORIZE_CHUNK_SIZE
+    from derivatives import DERIVATIVE_WORKERS
+    from feed import FEED_TIMELINE_LENGTH, FEED_POPULAR_FOLLOWERS
+    from likes import TRENDING_WINDOW_HOURS, TRENDING_HALF_LIFE_HOURS, TRENDING_SIZE
+
+    recategorize_parser = commands.add_parser("recategorize", help="Re-run category classification over the whole arts table.")
+    recategorize_parser.add_argument("--chunk-size", type=int, default=RECATEGORIZE_CHUNK_SIZE)
+    recategorize_parser.set_defaults(func=recategorize)
+
+    category_counts_parser = commands.add_parser("rebuild-category-counts", help="Recount categories.art_count from art_categories.")
+    category_counts_parser.set_defaults(func=rebuild_category_counts)
+
+    activity_parser = commands.add_parser("rebuild-activity", help="Rebuild the hourly art_activity rollup from arts.")
+    activity_parser.set_defaults(func=rebuild_activity)
+
+    timelines_parser = commands.add_parser("rebuild-timelines", help="Rebuild every follower timeline from the follows and arts tables.")
+    timelines_parser.add_argument("--length", type=int, default=FEED_TIMELINE_LENGTH)
+    timelines_parser.add_argument("--popular-followers", type=int, default=FEED_POPULAR_FOLLOWERS)
+    timelines_parser.set_defaults(func=rebuild_timelines)
+
+    trending_parser = commands.add_parser("refresh-trending", help="Recompute the trending ranking, and optionally every art's like count, from the likes table.")
+    trending_parser.add_argument(
+        "--rebuild-counts", action="store_true",
+        help="Also recount arts.like_count from likes. Running app workers may still hold up to "
+             "LIKES_FLUSH_INTERVAL_SECONDS of buffered deltas, which are applied on top of the rebuilt counts; "
+             "run it with the app stopped for exact counts.",
+    )
+    trending_parser.add_argument("--window-hours", type=float, default=TRENDING_WINDOW_HOURS)
+    trending_parser.add_argument("--half-life-hours", type=float, default=TRENDING_HALF_LIFE_HOURS)
+    trending_parser.add_argument("--size", type=int, default=TRENDING_SIZE)
+    trending_parser.set_defaults(func=refresh_trending)
+
+    derivatives_parser = commands.add_parser("backfill-derivatives", help="Generate missing thumbnails and WebP/AVIF variants for stored images.")
+    derivatives_parser.add_argument("--workers", type=int, default=DERIVATIVE_WORKERS)
+    derivatives_parser.set_defaults(func=backfill_derivatives)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
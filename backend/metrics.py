@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import logging
+import bisect
+import math
+import time
+import os
+
+METRICS_SLOW_REQUEST_SECONDS = float(os.environ.get("METRICS_SLOW_REQUEST_SECONDS", 1.0))
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BACKGROUND = "background"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+current_stages = ContextVar("current_stages", default=None)
+
+def label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Histogram:
+    def __init__(self, name: str, description: str, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        with self.lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self.series.items())
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total in snapshot:
+            label_text = ",".join(f'{name}="{label_value(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+request_duration = Histogram("http_request_duration_seconds", "Time spent serving HTTP requests.", ("method", "route", "status"))
+stage_duration = Histogram("stage_duration_seconds", "Time spent in each stage of a request or background job.", ("method", "route", "stage"))
+
+@contextmanager
+def span(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stages = current_stages.get()
+        if stages is None:
+            stage_duration.observe(("", BACKGROUND, stage), elapsed)
+        else:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+def render():
+    return "\n".join(request_duration.render() + stage_duration.render()) + "\n"
+
+class MetricsMiddleware:
+    def __init__(self, app, slow_request_seconds: float = METRICS_SLOW_REQUEST_SECONDS):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stages = {}
+        token = current_stages.set(stages)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_stages.reset(token)
+            # Label by route template rather than raw path to keep the series count bounded.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe((scope["method"], route, status), elapsed)
+            for stage, stage_elapsed in stages.items():
+                stage_duration.observe((scope["method"], route, stage), stage_elapsed)
+
+            if self.slow_request_seconds and elapsed >= self.slow_request_seconds:
+                breakdown = " ".join(f"{stage}={stage_elapsed * 1000:.1f}ms" for stage, stage_elapsed in stages.items())
+                logger.warning("Slow request %s %s -> %d in %.1fms %s", scope["method"], scope["path"], status, elapsed * 1000, breakdown)
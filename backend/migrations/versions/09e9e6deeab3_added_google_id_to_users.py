@@ -1,7 +1,7 @@
 """Added google_id to users
 
 Revision ID: 09e9e6deeab3
-Revises: 
+Revises: f03e48884d33
 Create Date: 2024-03-09 12:44:45.664547
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '09e9e6deeab3'
-down_revision: Union[str, None] = None
+down_revision: Union[str, None] = 'f03e48884d33'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
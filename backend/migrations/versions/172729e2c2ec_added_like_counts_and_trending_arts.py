@@ -0,0 +1,42 @@
+"""Added like counts and trending arts
+
+Revision ID: 172729e2c2ec
+Revises: fcf59d8caa26
+Create Date: 2026-10-18 16:48:03.517920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '172729e2c2ec'
+down_revision: Union[str, None] = 'fcf59d8caa26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('arts', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE arts SET like_count = "
+        "(SELECT count(*) FROM likes WHERE likes.art_id = arts.id)"
+    )
+    op.add_column('likes', sa.Column('date', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_likes_date'), 'likes', ['date'], unique=False)
+    op.create_table('trending_arts',
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('art_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['art_id'], ['arts.id'], ),
+    sa.PrimaryKeyConstraint('rank')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('trending_arts')
+    op.drop_index(op.f('ix_likes_date'), table_name='likes')
+    op.drop_column('likes', 'date')
+    op.drop_column('arts', 'like_count')
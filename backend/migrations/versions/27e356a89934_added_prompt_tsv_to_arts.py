@@ -0,0 +1,29 @@
+"""Added prompt_tsv to arts
+
+Revision ID: 27e356a89934
+Revises: 283c59153ddc
+Create Date: 2026-10-18 12:20:44.187530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '27e356a89934'
+down_revision: Union[str, None] = '283c59153ddc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('arts', sa.Column('prompt_tsv', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', coalesce(prompt, ''))", persisted=True), nullable=True))
+    op.create_index('ix_arts_prompt_tsv', 'arts', ['prompt_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_arts_prompt_tsv', table_name='arts', postgresql_using='gin')
+    op.drop_column('arts', 'prompt_tsv')
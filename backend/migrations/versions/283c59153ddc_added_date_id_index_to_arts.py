@@ -0,0 +1,27 @@
+"""Added (date, id) index to arts
+
+Revision ID: 283c59153ddc
+Revises: ff6d65189b3b
+Create Date: 2026-10-18 11:48:05.913320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '283c59153ddc'
+down_revision: Union[str, None] = 'ff6d65189b3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows created before arts.date existed keep their NULL date and sort last, matching crud.art_sort_date.
+    op.create_index('ix_arts_date_id', 'arts', [sa.text("coalesce(date, '0001-01-01 00:00:00'::timestamp)"), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_arts_date_id', table_name='arts')
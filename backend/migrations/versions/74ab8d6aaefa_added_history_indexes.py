@@ -0,0 +1,30 @@
+"""Added history indexes
+
+Revision ID: 74ab8d6aaefa
+Revises: 172729e2c2ec
+Create Date: 2026-10-18 17:21:36.804112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '74ab8d6aaefa'
+down_revision: Union[str, None] = '172729e2c2ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_search_history_date'), 'search_history', ['date'], unique=False)
+    op.create_index(op.f('ix_art_history_art_id'), 'art_history', ['art_id'], unique=False)
+    op.create_index(op.f('ix_art_history_date'), 'art_history', ['date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_art_history_date'), table_name='art_history')
+    op.drop_index(op.f('ix_art_history_art_id'), table_name='art_history')
+    op.drop_index(op.f('ix_search_history_date'), table_name='search_history')
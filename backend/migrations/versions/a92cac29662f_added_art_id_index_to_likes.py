@@ -0,0 +1,26 @@
+"""Added art_id index to likes
+
+Revision ID: a92cac29662f
+Revises: e1c5d2523728
+Create Date: 2026-10-18 14:37:09.651872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a92cac29662f'
+down_revision: Union[str, None] = 'e1c5d2523728'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_likes_art_id'), 'likes', ['art_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_likes_art_id'), table_name='likes')
@@ -0,0 +1,38 @@
+"""Added art_activity
+
+Revision ID: e1c5d2523728
+Revises: f2165401bfdc
+Create Date: 2026-10-18 13:41:52.208764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1c5d2523728'
+down_revision: Union[str, None] = 'f2165401bfdc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('art_activity',
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'owner_id')
+    )
+    op.create_index(op.f('ix_art_activity_owner_id'), 'art_activity', ['owner_id'], unique=False)
+    op.execute(
+        "INSERT INTO art_activity (bucket, owner_id, count) "
+        "SELECT date_trunc('hour', date), coalesce(owner_id, 0), count(*) FROM arts "
+        "WHERE date IS NOT NULL GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_art_activity_owner_id'), table_name='art_activity')
+    op.drop_table('art_activity')
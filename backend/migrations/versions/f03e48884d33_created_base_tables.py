@@ -0,0 +1,92 @@
+"""Created base tables
+
+Revision ID: f03e48884d33
+Revises: 
+Create Date: 2024-03-09 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f03e48884d33'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Schema as it stood before the first tracked change; databases that predate
+    # Alembic already have these tables and start from 09e9e6deeab3.
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('password', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('hidden', sa.Boolean(), nullable=True),
+    sa.Column('premium', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('arts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('image', sa.String(), nullable=True),
+    sa.Column('prompt', sa.String(), nullable=True),
+    sa.Column('premium', sa.Boolean(), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_arts_id'), 'arts', ['id'], unique=False)
+    op.create_table('follows',
+    sa.Column('follower_id', sa.Integer(), nullable=False),
+    sa.Column('followee_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['followee_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('follower_id', 'followee_id')
+    )
+    op.create_table('search_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('query', sa.String(), nullable=True),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_search_history_id'), 'search_history', ['id'], unique=False)
+    op.create_table('art_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('art_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['art_id'], ['arts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_art_history_id'), 'art_history', ['id'], unique=False)
+    op.create_table('likes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('art_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['art_id'], ['arts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'art_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('likes')
+    op.drop_index(op.f('ix_art_history_id'), table_name='art_history')
+    op.drop_table('art_history')
+    op.drop_index(op.f('ix_search_history_id'), table_name='search_history')
+    op.drop_table('search_history')
+    op.drop_table('follows')
+    op.drop_index(op.f('ix_arts_id'), table_name='arts')
+    op.drop_table('arts')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,32 @@
+"""Added art_count to categories
+
+Revision ID: f2165401bfdc
+Revises: 27e356a89934
+Create Date: 2026-10-18 13:02:17.550961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2165401bfdc'
+down_revision: Union[str, None] = '27e356a89934'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('art_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE categories SET art_count = "
+        "(SELECT count(*) FROM art_categories WHERE art_categories.category_id = categories.id)"
+    )
+    op.create_index(op.f('ix_categories_art_count'), 'categories', ['art_count'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_categories_art_count'), table_name='categories')
+    op.drop_column('categories', 'art_count')
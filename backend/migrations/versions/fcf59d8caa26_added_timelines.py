@@ -0,0 +1,39 @@
+"""Added timelines
+
+Revision ID: fcf59d8caa26
+Revises: a92cac29662f
+Create Date: 2026-10-18 16:12:41.208337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fcf59d8caa26'
+down_revision: Union[str, None] = 'a92cac29662f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('timelines',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('art_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['art_id'], ['arts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'art_id')
+    )
+    op.create_index('ix_timelines_user_id_date_art_id', 'timelines', ['user_id', 'date', 'art_id'], unique=False)
+    op.create_index(op.f('ix_follows_followee_id'), 'follows', ['followee_id'], unique=False)
+    op.create_index('ix_arts_owner_id_date_id', 'arts', ['owner_id', 'date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_arts_owner_id_date_id', table_name='arts')
+    op.drop_index(op.f('ix_follows_followee_id'), table_name='follows')
+    op.drop_index('ix_timelines_user_id_date_art_id', table_name='timelines')
+    op.drop_table('timelines')
@@ -0,0 +1,30 @@
+"""Added index_status to arts
+
+Revision ID: ff6d65189b3b
+Revises: 1e3a0e039d62
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ff6d65189b3b'
+down_revision: Union[str, None] = '1e3a0e039d62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Arts created before the background indexer were embedded synchronously.
+    op.add_column('arts', sa.Column('index_status', sa.String(), server_default='indexed', nullable=False))
+    op.alter_column('arts', 'index_status', server_default=None)
+    op.create_index(op.f('ix_arts_index_status'), 'arts', ['index_status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_arts_index_status'), table_name='arts')
+    op.drop_column('arts', 'index_status')
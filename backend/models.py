@@ -1,9 +1,13 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Float, Table, Index, Computed, text
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.dialects.postgresql import TSVECTOR
 from database import Base
 from datetime import datetime
 
+# Arts from before arts.date existed keep a NULL date and sort after every dated art.
+UNDATED = datetime(1, 1, 1)
+ART_SORT_DATE = f"coalesce(date, '{UNDATED}'::timestamp)"
+
 art_categories = Table('art_categories', Base.metadata,
     Column('art_id', Integer, ForeignKey('arts.id'), primary_key=True),
     Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True)
@@ -38,19 +42,28 @@ class Art(Base):
     premium = Column(Boolean, default=False)
     date = Column(DateTime, default= datetime.utcnow)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    index_status = Column(String, default="pending", nullable=False, index=True)
+    like_count = Column(Integer, default=0, server_default="0", nullable=False)
+    prompt_tsv = deferred(Column(TSVECTOR, Computed("to_tsvector('english', coalesce(prompt, ''))", persisted=True)))
 
     owner = relationship("User", back_populates="arts")
     likes = relationship("Like", back_populates="art")
     art_history = relationship("ArtHistory", back_populates="art")
     categories = relationship("Category", secondary=art_categories, back_populates="arts")
 
+    __table_args__ = (
+        Index("ix_arts_date_id", text(ART_SORT_DATE), "id"),
+        Index("ix_arts_prompt_tsv", "prompt_tsv", postgresql_using="gin"),
+        Index("ix_arts_owner_id_date_id", "owner_id", "date", "id"),
+    )
+
 class SearchHistory(Base):
     __tablename__ = "search_history"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     query = Column(String)
-    date = Column(DateTime)
+    date = Column(DateTime, index=True)
 
     user = relationship("User", back_populates="search_history")
 
@@ -58,9 +71,9 @@ class ArtHistory(Base):
     __tablename__ = "art_history"
 
     id = Column(Integer, primary_key=True, index=True)
-    art_id = Column(Integer, ForeignKey("arts.id"))
+    art_id = Column(Integer, ForeignKey("arts.id"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    date = Column(DateTime)
+    date = Column(DateTime, index=True)
 
     user = relationship("User", back_populates="art_history")
     art = relationship("Art", back_populates="art_history")
@@ -69,7 +82,8 @@ class Like(Base):
     __tablename__ = "likes"
     
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
-    art_id = Column(Integer, ForeignKey("arts.id"), primary_key=True)
+    art_id = Column(Integer, ForeignKey("arts.id"), primary_key=True, index=True)
+    date = Column(DateTime, default=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="likes")
     art = relationship("Art", back_populates="likes")
@@ -78,7 +92,7 @@ class Follow(Base):
     __tablename__ = "follows"
     
     follower_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
-    followee_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    followee_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
 
     follower = relationship("User", foreign_keys=[follower_id], back_populates="followers")
     followee = relationship("User", foreign_keys=[followee_id], back_populates="following")
@@ -88,5 +102,31 @@ class Category(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
+    art_count = Column(Integer, default=0, server_default="0", nullable=False, index=True)
 
     arts = relationship("Art", secondary=art_categories, back_populates="categories")
+
+class ArtActivity(Base):
+    __tablename__ = "art_activity"
+
+    bucket = Column(DateTime, primary_key=True)
+    owner_id = Column(Integer, primary_key=True, index=True)
+    count = Column(Integer, default=0, nullable=False)
+
+class Timeline(Base):
+    __tablename__ = "timelines"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    art_id = Column(Integer, ForeignKey("arts.id"), primary_key=True)
+    date = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_timelines_user_id_date_art_id", "user_id", "date", "art_id"),
+    )
+
+class TrendingArt(Base):
+    __tablename__ = "trending_arts"
+
+    rank = Column(Integer, primary_key=True)
+    art_id = Column(Integer, ForeignKey("arts.id"), nullable=False)
+    score = Column(Float, nullable=False)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, computed_field
+from typing import Dict, List, Optional
 from datetime import datetime
+import variants
 
 class UserBase(BaseModel):
     email: str
@@ -33,6 +34,30 @@ class Art(ArtBase):
     date: datetime
     premium: bool
     owner_id: Optional[int] = None
+    index_status: str
+    like_count: int = 0
+    category_names: List[str] = []
+
+    @computed_field
+    @property
+    def variants(self) -> Dict[str, Dict[str, str]]:
+        return variants.variant_urls(self.image)
+
+    class Config:
+        from_attributes = True
+
+class BulkArtError(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    detail: str
+
+class BulkArtResult(BaseModel):
+    arts: List[Art]
+    errors: List[BulkArtError]
+
+class ArtIndexStatus(BaseModel):
+    id: int
+    index_status: str
 
     class Config:
         from_attributes = True
@@ -45,6 +70,11 @@ class LikeBase(BaseModel):
     class Config:
         from_attributes = True
 
+class LikeStatus(BaseModel):
+    art_id: int
+    liked: bool
+    like_count: int
+
 # Follow Schemas
 class FollowBase(BaseModel):
     follower_id: int
@@ -85,4 +115,8 @@ class ArtHistory(ArtHistoryBase):
 
 class CategoryCount(BaseModel):
     name: str
-    count: int
\ No newline at end of file
+    count: int
+
+class ActivityBucket(BaseModel):
+    bucket: datetime
+    count: int
@@ -0,0 +1,71 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from vector_store import get_prompts_collection, filter_chroma
+from embeddings import get_embedding_function
+from vector_index import prompt_index, VECTOR_INDEX_ENABLED
+from metrics import span
+import models
+import asyncio
+import logging
+import time
+import os
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+SEARCH_DEFAULT_MODE = os.environ.get("SEARCH_DEFAULT_MODE", "vector")
+SEARCH_LEXICAL_LIMIT = int(os.environ.get("SEARCH_LEXICAL_LIMIT", 20))
+SEARCH_VECTOR_TIMEOUT_SECONDS = float(os.environ.get("SEARCH_VECTOR_TIMEOUT_SECONDS", 1.5))
+SEARCH_VECTOR_COOLDOWN_SECONDS = float(os.environ.get("SEARCH_VECTOR_COOLDOWN_SECONDS", 30))
+RRF_K = 60
+
+logger = logging.getLogger(__name__)
+vector_unavailable_until = 0.0
+
+def use_prompt_index():
+    return VECTOR_INDEX_ENABLED and prompt_index.covers()
+
+def vector_search(query: str):
+    with span("embedding"):
+        query_embeddings = get_embedding_function()([query])
+    if use_prompt_index():
+        with span("vector_index_query"):
+            results = prompt_index.search(query_embeddings)
+    else:
+        with span("chroma_query"):
+            results = get_prompts_collection().query(query_embeddings=query_embeddings, include=["distances"])
+    return filter_chroma(results)
+
+async def lexical_search(db: AsyncSession, query: str, limit: int = SEARCH_LEXICAL_LIMIT):
+    ts_query = func.websearch_to_tsquery("english", query)
+    with span("db"):
+        art_ids = await db.scalars(
+            select(models.Art.id)
+            .where(models.Art.prompt_tsv.op("@@")(ts_query))
+            .order_by(func.ts_rank_cd(models.Art.prompt_tsv, ts_query).desc(), models.Art.id.desc())
+            .limit(limit)
+        )
+        return art_ids.all()
+
+def reciprocal_rank_fusion(rankings, k: int = RRF_K):
+    scores = {}
+    for ranking in rankings:
+        for rank, art_id in enumerate(ranking):
+            scores[art_id] = scores.get(art_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+async def ranked_ids(db: AsyncSession, query: str, mode: str = SEARCH_DEFAULT_MODE):
+    global vector_unavailable_until
+
+    if mode == "lexical" or time.monotonic() < vector_unavailable_until:
+        return await lexical_search(db, query), mode == "lexical"
+
+    lexical = asyncio.create_task(lexical_search(db, query)) if mode == "hybrid" else None
+    try:
+        vector_ids = await asyncio.wait_for(asyncio.to_thread(vector_search, query), SEARCH_VECTOR_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning("Vector search unavailable, serving lexical results: %r", e)
+        vector_unavailable_until = time.monotonic() + SEARCH_VECTOR_COOLDOWN_SECONDS
+        return await (lexical or lexical_search(db, query)), False
+
+    if lexical is None:
+        return vector_ids, True
+    return reciprocal_rank_fusion([vector_ids, await lexical]), True
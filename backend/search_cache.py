@@ -0,0 +1,88 @@
+from collections import OrderedDict
+import threading
+import time
+import os
+
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", 2048))
+SEARCH_CACHE_TTL_SECONDS = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", 300))
+ART_CACHE_SIZE = int(os.environ.get("ART_CACHE_SIZE", 4096))
+ART_CACHE_TTL_SECONDS = float(os.environ.get("ART_CACHE_TTL_SECONDS", 30))
+
+def normalize_query(query: str):
+    return " ".join(query.lower().split())
+
+class SearchCache:
+    def __init__(self, size: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self.generation = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def bump(self):
+        with self.lock:
+            self.generation += 1
+
+    def get(self, query: str, mode: str = "vector"):
+        key = (mode, normalize_query(query))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            generation, expires, art_ids = entry
+            if generation != self.generation or expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return art_ids
+
+    def put(self, query: str, mode: str, art_ids, generation: int):
+        with self.lock:
+            if generation != self.generation:
+                return
+            key = (mode, normalize_query(query))
+            self.entries[key] = (generation, time.monotonic() + self.ttl, art_ids)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+class ArtCache:
+    # Other workers and CLI jobs change like counts, index status and categories without
+    # reaching this process, so entries also expire after a short TTL.
+    def __init__(self, size: int = ART_CACHE_SIZE, ttl: float = ART_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, art_ids):
+        found = {}
+        now = time.monotonic()
+        with self.lock:
+            for art_id in art_ids:
+                entry = self.entries.get(art_id)
+                if entry is None:
+                    continue
+                expires, art = entry
+                if expires < now:
+                    del self.entries[art_id]
+                    continue
+                self.entries.move_to_end(art_id)
+                found[art_id] = art
+        return found
+
+    def put(self, art):
+        with self.lock:
+            self.entries[art["id"]] = (time.monotonic() + self.ttl, art)
+            self.entries.move_to_end(art["id"])
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return art
+
+    def invalidate(self, art_ids):
+        with self.lock:
+            for art_id in art_ids:
+                self.entries.pop(art_id, None)
+
+search_cache = SearchCache()
+art_cache = ArtCache()
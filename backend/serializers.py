@@ -0,0 +1,18 @@
+from variants import variant_urls
+
+def art_list(rows, category_names):
+    return [
+        {
+            "id": art_id,
+            "prompt": prompt,
+            "image": image,
+            "date": date,
+            "premium": bool(premium),
+            "owner_id": owner_id,
+            "index_status": index_status,
+            "like_count": like_count,
+            "category_names": category_names.get(art_id, []),
+            "variants": variant_urls(image),
+        }
+        for art_id, prompt, image, date, premium, owner_id, index_status, like_count in rows
+    ]
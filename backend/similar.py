@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from database import AsyncSessionLocal
+from vector_store import get_prompts_collection
+from vector_index import prompt_index
+from search import use_prompt_index
+from background import PeriodicTask
+from metrics import span
+import threading
+import asyncio
+import logging
+import crud
+import os
+
+SIMILAR_LIMIT = int(os.environ.get("SIMILAR_LIMIT", 12))
+SIMILAR_CACHE_SIZE = int(os.environ.get("SIMILAR_CACHE_SIZE", 10000))
+SIMILAR_STALE_ARTS = int(os.environ.get("SIMILAR_STALE_ARTS", 100))
+SIMILAR_PRECOMPUTE_ARTS = int(os.environ.get("SIMILAR_PRECOMPUTE_ARTS", 500))
+SIMILAR_PRECOMPUTE_DAYS = float(os.environ.get("SIMILAR_PRECOMPUTE_DAYS", 7))
+SIMILAR_PRECOMPUTE_SECONDS = float(os.environ.get("SIMILAR_PRECOMPUTE_SECONDS", 600))
+SIMILAR_BATCH_SIZE = 256
+
+logger = logging.getLogger(__name__)
+
+def vector_count():
+    if use_prompt_index():
+        return len(prompt_index)
+    return get_prompts_collection().count()
+
+def stored_embeddings(art_ids):
+    with span("chroma_get"):
+        result = get_prompts_collection().get(ids=[str(id_) for id_ in art_ids], include=["embeddings"])
+    return {int(id_): embedding for id_, embedding in zip(result["ids"], result["embeddings"])}
+
+def nearest(art_ids, embeddings, limit: int = SIMILAR_LIMIT):
+    # One extra result, since every art is its own nearest neighbor.
+    if use_prompt_index():
+        with span("vector_index_query"):
+            results = prompt_index.search(embeddings, n_results=limit + 1)
+    else:
+        with span("chroma_query"):
+            results = get_prompts_collection().query(query_embeddings=embeddings, n_results=limit + 1, include=["distances"])
+    return [
+        [int(id_) for id_ in ids if int(id_) != art_id][:limit]
+        for art_id, ids in zip(art_ids, results["ids"])
+    ]
+
+class NeighborCache:
+    def __init__(self, size: int = SIMILAR_CACHE_SIZE, stale_arts: int = SIMILAR_STALE_ARTS):
+        self.size = size
+        self.stale_arts = stale_arts
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, art_id: int, count: int):
+        with self.lock:
+            entry = self.entries.get(art_id)
+            if entry is None:
+                return None
+            computed_at, neighbor_ids = entry
+            # New arts only matter once enough of them could have displaced a neighbor.
+            if count - computed_at >= self.stale_arts or count < computed_at:
+                del self.entries[art_id]
+                return None
+            self.entries.move_to_end(art_id)
+            return neighbor_ids
+
+    def put(self, art_id: int, count: int, neighbor_ids):
+        with self.lock:
+            self.entries[art_id] = (count, neighbor_ids)
+            self.entries.move_to_end(art_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+neighbor_cache = NeighborCache()
+
+def similar_ids(art_id: int, limit: int = SIMILAR_LIMIT):
+    count = vector_count()
+    neighbor_ids = neighbor_cache.get(art_id, count)
+    if neighbor_ids is None:
+        embeddings = stored_embeddings([art_id])
+        if art_id not in embeddings:
+            return None
+        neighbor_ids = nearest([art_id], [embeddings[art_id]])[0]
+        neighbor_cache.put(art_id, count, neighbor_ids)
+    return neighbor_ids[:limit]
+
+def precompute(art_ids):
+    count = vector_count()
+    computed = 0
+    for start in range(0, len(art_ids), SIMILAR_BATCH_SIZE):
+        batch = art_ids[start:start + SIMILAR_BATCH_SIZE]
+        embeddings = stored_embeddings(batch)
+        found = [art_id for art_id in batch if art_id in embeddings]
+        if not found:
+            continue
+        for art_id, neighbor_ids in zip(found, nearest(found, [embeddings[art_id] for art_id in found])):
+            neighbor_cache.put(art_id, count, neighbor_ids)
+        computed += len(found)
+    return computed
+
+async def get_similar_ids(art_id: int, limit: int = SIMILAR_LIMIT):
+    return await asyncio.to_thread(similar_ids, art_id, min(limit, SIMILAR_LIMIT))
+
+class PrecomputeJob(PeriodicTask):
+    failure_message = "Similar art precompute failed"
+
+    def __init__(self, arts: int = SIMILAR_PRECOMPUTE_ARTS, days: float = SIMILAR_PRECOMPUTE_DAYS, interval: float = SIMILAR_PRECOMPUTE_SECONDS):
+        super().__init__(interval)
+        self.arts = arts
+        self.days = days
+
+    async def refresh(self):
+        async with AsyncSessionLocal() as db:
+            art_ids = await crud.get_most_viewed_art_ids(db, datetime.utcnow() - timedelta(days=self.days), self.arts)
+        return await asyncio.to_thread(precompute, list(art_ids))
+
+    async def tick(self):
+        computed = await self.refresh()
+        if computed:
+            logger.info("Precomputed similar arts for %d most-viewed arts", computed)
+
+precompute_job = PrecomputeJob()
@@ -0,0 +1,88 @@
+from fastapi import HTTPException, UploadFile
+import tempfile
+import hashlib
+import asyncio
+import glob
+import os
+import re
+
+IMAGES_DIR = "./images"
+IMAGES_URL = "/images"
+# Partial uploads live outside the served directory, on the same filesystem so os.replace stays atomic.
+UPLOADS_TEMP_DIR = "./images.tmp"
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_BULK_UPLOADS = int(os.environ.get("MAX_BULK_UPLOADS", 50))
+
+IMAGE_SIGNATURES = [
+    (0, b"\x89PNG\r\n\x1a\n"),
+    (0, b"\xff\xd8\xff"),
+    (0, b"GIF87a"),
+    (0, b"GIF89a"),
+    (0, b"BM"),
+    (0, b"II*\x00"),
+    (0, b"MM\x00*"),
+    (8, b"WEBP"),
+    (8, b"avif"),
+    (8, b"avis"),
+]
+
+async def is_image_upload(upload: UploadFile):
+    # A signature check is enough to turn away non-images; decoding is left to the derivative workers.
+    head = await upload.read(16)
+    await upload.seek(0)
+    return any(head[offset:offset + len(signature)] == signature for offset, signature in IMAGE_SIGNATURES)
+
+def upload_extension(filename: str):
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    return extension if re.fullmatch(r"[a-z0-9]{1,8}", extension) else "bin"
+
+def blob_dir(digest: str):
+    return os.path.join(IMAGES_DIR, digest[:2], digest[2:4])
+
+def find_blob(digest: str):
+    matches = glob.glob(os.path.join(blob_dir(digest), f"{digest}.*"))
+    return matches[0] if matches else None
+
+def blob_url(path: str):
+    return IMAGES_URL + "/" + os.path.relpath(path, IMAGES_DIR).replace(os.sep, "/")
+
+def _write_chunk(buffer, hasher, chunk):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+def _commit_blob(temp_path, digest, extension):
+    existing = find_blob(digest)
+    if existing:
+        os.remove(temp_path)
+        return existing
+
+    os.makedirs(blob_dir(digest), exist_ok=True)
+    path = os.path.join(blob_dir(digest), f"{digest}.{extension}")
+    os.replace(temp_path, path)
+    return path
+
+async def save_upload(upload: UploadFile):
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Upload too large")
+
+    extension = upload_extension(upload.filename)
+    os.makedirs(UPLOADS_TEMP_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=UPLOADS_TEMP_DIR, suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+                await asyncio.to_thread(_write_chunk, buffer, hasher, chunk)
+        path = await asyncio.to_thread(_commit_blob, temp_path, hasher.hexdigest(), extension)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return blob_url(path)
@@ -0,0 +1,28 @@
+from functools import lru_cache
+import os
+
+DERIVATIVES_URL = "/derivatives"
+VARIANTS = {"thumb": 256, "medium": 768}
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "webp", "gif", "bmp", "tif", "tiff", "avif"}
+
+@lru_cache(maxsize=1)
+def formats():
+    # Imported here so schemas and serializers stay free of Pillow until a URL is built.
+    from PIL import features
+    return ("webp",) + (("avif",) if features.check("avif") else ())
+
+def image_stem(image_url: str):
+    return os.path.splitext(os.path.basename(image_url))[0]
+
+def is_image(path: str):
+    return os.path.splitext(path)[1][1:].lower() in IMAGE_EXTENSIONS
+
+@lru_cache(maxsize=16384)
+def variant_urls(image_url: str):
+    if not is_image(image_url):
+        return {}
+    stem = image_stem(image_url)
+    return {
+        variant: {fmt: f"{DERIVATIVES_URL}/{stem}.{variant}.{fmt}" for fmt in formats()}
+        for variant in VARIANTS
+    }
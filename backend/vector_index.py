@@ -0,0 +1,221 @@
+import numpy as np
+import threading
+import logging
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+VECTOR_INDEX_DIR = os.environ.get("VECTOR_INDEX_DIR", "./vector_index")
+VECTOR_INDEX_DTYPE = os.environ.get("VECTOR_INDEX_DTYPE", "int8")
+VECTOR_INDEX_ENABLED = os.environ.get("VECTOR_INDEX_ENABLED", "1") == "1"
+VECTOR_INDEX_BLOCK_ROWS = int(os.environ.get("VECTOR_INDEX_BLOCK_ROWS", 4096))
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+MANIFEST = "manifest.json"
+SNAPSHOT_PAGE_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+def quantize(embeddings, dtype: str):
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        values = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    else:
+        scales = np.ones(len(vectors), dtype=np.float32)
+        values = vectors.astype(DTYPES[dtype])
+    # Norms of the stored (dequantized) vectors, so distances stay consistent with what is searched.
+    restored = values.astype(np.float32) * scales[:, None]
+    norms = np.einsum("ij,ij->i", restored, restored)
+    return values, scales.astype(np.float32), norms.astype(np.float32)
+
+class VectorIndex:
+    def __init__(self, path: str = VECTOR_INDEX_DIR, dtype: str = VECTOR_INDEX_DTYPE, block_rows: int = VECTOR_INDEX_BLOCK_ROWS):
+        self.path = path
+        self.dtype = dtype
+        self.block_rows = block_rows
+        self.manifest = None
+        self.manifest_stat = None
+        self.arrays = None
+        self.lock = threading.Lock()
+
+    def file(self, generation: int, name: str):
+        return os.path.join(self.path, f"{generation}.{name}")
+
+    def read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write_manifest(self, manifest):
+        temp_path = os.path.join(self.path, f"{MANIFEST}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, os.path.join(self.path, MANIFEST))
+
+    def refresh(self):
+        try:
+            stat = os.stat(os.path.join(self.path, MANIFEST))
+        except FileNotFoundError:
+            self.manifest, self.arrays = None, None
+            return 0
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self.lock:
+            if key != self.manifest_stat:
+                manifest = self.read_manifest()
+                self.arrays = self.map(manifest) if manifest and manifest["count"] else None
+                self.manifest, self.manifest_stat = manifest, key
+            return self.manifest["count"] if self.manifest else 0
+
+    def map(self, manifest):
+        generation, count, dims = manifest["generation"], manifest["count"], manifest["dims"]
+        return (
+            np.memmap(self.file(generation, "ids"), dtype=np.int64, mode="r", shape=(count,)),
+            np.memmap(self.file(generation, "vectors"), dtype=DTYPES[manifest["dtype"]], mode="r", shape=(count, dims)),
+            np.memmap(self.file(generation, "scales"), dtype=np.float32, mode="r", shape=(count,)),
+            np.memmap(self.file(generation, "norms"), dtype=np.float32, mode="r", shape=(count,)),
+        )
+
+    def __len__(self):
+        return self.refresh()
+
+    def search(self, query_embeddings, n_results: int = 10):
+        self.refresh()
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        arrays = self.arrays
+        if arrays is None:
+            return {"ids": [[] for _ in queries], "distances": [[] for _ in queries]}
+        ids, vectors, scales, norms = arrays
+
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        candidate_rows = []
+        candidate_distances = []
+        for start in range(0, len(ids), self.block_rows):
+            end = min(start + self.block_rows, len(ids))
+            # Squared L2, matching the Prompts collection, computed one block at a time so
+            # the dequantized copy stays small while the mapped file is shared between workers.
+            dots = (vectors[start:end].astype(np.float32) @ queries.T) * scales[start:end, None]
+            distances = norms[start:end, None] + query_norms[None, :] - 2 * dots
+            k = min(n_results, end - start)
+            rows = np.argpartition(distances, k - 1, axis=0)[:k]
+            candidate_rows.append(rows + start)
+            candidate_distances.append(np.take_along_axis(distances, rows, axis=0))
+
+        rows = np.concatenate(candidate_rows)
+        distances = np.concatenate(candidate_distances)
+        result_ids, result_distances = [], []
+        for column in range(len(queries)):
+            order = np.argsort(distances[:, column], kind="stable")
+            seen = set()
+            query_ids, query_distances = [], []
+            for position in order:
+                art_id = int(ids[rows[position, column]])
+                if art_id in seen:
+                    continue
+                seen.add(art_id)
+                query_ids.append(str(art_id))
+                query_distances.append(max(float(distances[position, column]), 0.0))
+                if len(query_ids) == n_results:
+                    break
+            result_ids.append(query_ids)
+            result_distances.append(query_distances)
+        return {"ids": result_ids, "distances": result_distances}
+
+    def writer_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        lock_file = open(os.path.join(self.path, "writer.lock"), "w")
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def write_rows(self, generation: int, count: int, art_ids, embeddings, dtype: str):
+        values, scales, norms = quantize(embeddings, dtype)
+        columns = (
+            ("ids", np.asarray(art_ids, dtype=np.int64), 8),
+            ("vectors", values, values.itemsize * values.shape[1]),
+            ("scales", scales, 4),
+            ("norms", norms, 4),
+        )
+        for name, data, row_bytes in columns:
+            with open(self.file(generation, name), "ab") as f:
+                # Drop rows from an append that crashed before its manifest was written.
+                f.truncate(count * row_bytes)
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, art_ids, embeddings, collection):
+        # The rows must already be in the collection, which seeds the index when it has no snapshot yet.
+        if not len(art_ids):
+            return
+        with self.writer_lock():
+            manifest = self.read_manifest()
+            if manifest is None:
+                self.write_snapshot(collection, self.dtype, None)
+                return
+            if manifest["count"] and len(embeddings[0]) != manifest["dims"]:
+                raise ValueError(f"Expected {manifest['dims']}-dimensional vectors, got {len(embeddings[0])}; run manage.py snapshot-vectors")
+            if manifest["count"]:
+                # A retried indexing batch appends the same arts again.
+                stored = np.memmap(self.file(manifest["generation"], "ids"), dtype=np.int64, mode="r", shape=(manifest["count"],))
+                fresh = ~np.isin(np.asarray(art_ids, dtype=np.int64), stored)
+                art_ids = [art_id for art_id, keep in zip(art_ids, fresh) if keep]
+                embeddings = [embedding for embedding, keep in zip(embeddings, fresh) if keep]
+                if not art_ids:
+                    return
+            self.write_rows(manifest["generation"], manifest["count"], art_ids, embeddings, manifest["dtype"])
+            manifest["count"] += len(art_ids)
+            manifest["dims"] = len(embeddings[0])
+            self.write_manifest(manifest)
+
+    def mark_incomplete(self):
+        # Chroma took rows the index missed; queries go to Chroma until the next snapshot.
+        with self.writer_lock():
+            manifest = self.read_manifest()
+            if manifest and manifest.get("complete"):
+                manifest["complete"] = False
+                self.write_manifest(manifest)
+
+    def build(self, collection, dtype: str = None):
+        with self.writer_lock():
+            return self.write_snapshot(collection, dtype or self.dtype, self.read_manifest())
+
+    def write_snapshot(self, collection, dtype: str, previous):
+        generation = previous["generation"] + 1 if previous else 1
+        manifest = {"generation": generation, "count": 0, "dims": 0, "dtype": dtype, "complete": False}
+        for name in ("ids", "vectors", "scales", "norms"):
+            open(self.file(generation, name), "wb").close()
+
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings"], limit=SNAPSHOT_PAGE_SIZE, offset=offset)
+            if not len(page["ids"]):
+                break
+            manifest["dims"] = len(page["embeddings"][0])
+            self.write_rows(generation, manifest["count"], [int(id_) for id_ in page["ids"]], page["embeddings"], dtype)
+            manifest["count"] += len(page["ids"])
+            offset += len(page["ids"])
+
+        manifest["complete"] = True
+        self.write_manifest(manifest)
+        if previous:
+            for name in ("ids", "vectors", "scales", "norms"):
+                try:
+                    os.remove(self.file(previous["generation"], name))
+                except OSError:
+                    pass
+        logger.info("Snapshotted %d prompt vectors as %s (generation %d)", manifest["count"], dtype, generation)
+        return manifest["count"]
+
+    def covers(self):
+        # Rows missing from the snapshot would silently drop out of results, so Chroma answers until it catches up.
+        count = self.refresh()
+        return count > 0 and self.manifest.get("complete", False)
+
+prompt_index = VectorIndex()
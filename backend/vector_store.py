@@ -0,0 +1,61 @@
+from embeddings import EMBEDDING_MODEL, embedding_dimensions, get_embedding_function
+import threading
+import os
+
+CHROMA_PATH = os.environ.get("CHROMA_PATH", "./chroma_data")
+
+chroma_client = None
+collections = {}
+lock = threading.Lock()
+
+def get_client():
+    global chroma_client
+    with lock:
+        if chroma_client is None:
+            import chromadb
+
+            chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return chroma_client
+
+def get_collection(name: str, create: bool = True):
+    collection = collections.get(name)
+    if collection is None:
+        client = get_client()
+        if create:
+            collection = client.get_or_create_collection(name=name, embedding_function=get_embedding_function())
+        else:
+            collection = client.get_collection(name=name, embedding_function=get_embedding_function())
+        check_dimensions(collection)
+        collections[name] = collection
+    return collection
+
+def drop_collection(name: str):
+    collections.pop(name, None)
+    client = get_client()
+    if name in [collection.name for collection in client.list_collections()]:
+        client.delete_collection(name=name)
+
+def check_dimensions(collection):
+    expected = embedding_dimensions()
+    if expected is None or not collection.count():
+        return
+    stored = len(collection.peek(1)["embeddings"][0])
+    if stored != expected:
+        raise RuntimeError(
+            f"The {collection.name} collection holds {stored}-dimension embeddings, but {EMBEDDING_MODEL} produces {expected}; "
+            f"recreate it with `python manage.py reindex-prompts --recreate` (Prompts) or `python manage.py seed-categories --recreate` (Categories)"
+        )
+
+def get_prompts_collection():
+    return get_collection("Prompts")
+
+def get_categories_collection():
+    # Categories are created by seeding; an empty collection would silently classify nothing.
+    return get_collection("Categories", create=False)
+
+def filter_chroma(results, threshold = 0.47, row = 0):
+    int_ids = [int(id_) for id_ in results["ids"][row]]
+    distances = results["distances"][row]
+    filtered_ids = [id_ for id_, distance in zip(int_ids, distances) if distance < threshold]
+
+    return filtered_ids
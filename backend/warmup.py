@@ -0,0 +1,44 @@
+from sqlalchemy import text
+from database import async_engine
+from embeddings import get_embedding_function
+from vector_store import get_prompts_collection
+from vector_index import prompt_index
+from classifier import category_classifier
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+checks = {}
+
+async def check_database():
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def run_check(name: str, check):
+    started = time.perf_counter()
+    try:
+        await check()
+        checks[name] = {"ok": True}
+    except Exception as e:
+        logger.warning("Warm-up step %s failed: %r", name, e)
+        checks[name] = {"ok": False, "error": repr(e)}
+    checks[name]["seconds"] = round(time.perf_counter() - started, 4)
+    return checks[name]["ok"]
+
+STEPS = (
+    ("database", check_database),
+    ("embeddings", lambda: asyncio.to_thread(get_embedding_function)),
+    ("chroma", lambda: asyncio.to_thread(get_prompts_collection)),
+    ("vector_index", lambda: asyncio.to_thread(prompt_index.refresh)),
+    ("categories", lambda: asyncio.to_thread(category_classifier.load)),
+)
+
+async def warm_up():
+    started = time.perf_counter()
+    for name, check in STEPS:
+        await run_check(name, check)
+    logger.info("Warm-up finished in %.2fs: %s", time.perf_counter() - started, {name: check["ok"] for name, check in checks.items()})
+
+def is_ready(*names):
+    return all(checks.get(name, {}).get("ok") for name in names or [name for name, _ in STEPS])